@@ -23,8 +23,12 @@ from handlers.profile_handler import ProfileHandler
 from handlers.leaderboard_handler import LeaderboardHandler
 from handlers.admin_handler import AdminHandler
 from managers.database_manager import DatabaseManager
+from managers.query_stats import QueryStats
 from managers.user_manager import UserManager
+from managers.rank_manager import RankManager
+from managers.achievement_manager import AchievementManager
 from managers.notification_manager import NotificationManager
+from managers.lesson_manager import LessonManager
 from utils.error_handler import error_handler
 from config import Config
 
@@ -43,14 +47,32 @@ class LanguageLearningBot:
         self.config = Config()
         self.db_manager = None
         self.user_manager = None
+        self.lesson_manager = None
         self.notification_manager = None
         
     async def initialize(self):
         """Initialize database and managers"""
-        self.db_manager = DatabaseManager(self.config.DB_PATH)
+        self.db_manager = DatabaseManager(
+            self.config.DB_PATH,
+            read_pool_size=self.config.DB_READ_POOL_SIZE,
+            busy_timeout_ms=self.config.DB_BUSY_TIMEOUT_MS,
+            group_commit=self.config.DB_GROUP_COMMIT,
+            group_commit_window_ms=self.config.DB_GROUP_COMMIT_WINDOW_MS,
+            group_commit_max_batch=self.config.DB_GROUP_COMMIT_MAX_BATCH,
+            synchronous=self.config.DB_SYNCHRONOUS,
+            query_stats=(
+                QueryStats(slow_query_ms=self.config.DB_SLOW_QUERY_MS)
+                if self.config.DB_QUERY_STATS else None
+            )
+        )
         await self.db_manager.initialize()
         
-        self.user_manager = UserManager(self.db_manager)
+        rank_manager = RankManager(self.db_manager, in_memory=self.config.RANK_IN_MEMORY)
+        await rank_manager.load()
+        
+        self.user_manager = UserManager(self.db_manager, rank_manager=rank_manager)
+        self.achievement_manager = AchievementManager(self.user_manager)
+        self.lesson_manager = LessonManager(self.config.LESSONS_PATH)
         self.notification_manager = NotificationManager(self.user_manager)
         
         logger.info("✅ Bot initialized successfully")
@@ -59,11 +81,16 @@ class LanguageLearningBot:
         """Register all command and callback handlers"""
         
         # Initialize handlers
-        start_handler = StartHandler(self.user_manager)
-        lesson_handler = LessonHandler(self.user_manager)
-        quiz_handler = QuizHandler(self.user_manager)
+        lesson_handler = LessonHandler(self.user_manager, self.lesson_manager)
+        quiz_handler = QuizHandler(self.user_manager, self.lesson_manager)
         profile_handler = ProfileHandler(self.user_manager)
         leaderboard_handler = LeaderboardHandler(self.user_manager)
+        start_handler = StartHandler(
+            self.user_manager,
+            lesson_handler=lesson_handler,
+            profile_handler=profile_handler,
+            leaderboard_handler=leaderboard_handler
+        )
         admin_handler = AdminHandler(self.user_manager, self.config)
         
         # Command handlers
@@ -74,6 +101,7 @@ class LanguageLearningBot:
         application.add_handler(CommandHandler("top", leaderboard_handler.show_leaderboard))
         application.add_handler(CommandHandler("backup", admin_handler.backup_db))
         application.add_handler(CommandHandler("restore", admin_handler.restore_db))
+        application.add_handler(CommandHandler("dbstats", admin_handler.db_stats))
         
         # Callback query handlers
         application.add_handler(CallbackQueryHandler(
@@ -100,6 +128,10 @@ class LanguageLearningBot:
             profile_handler.handle_profile_actions,
             pattern="^profile_"
         ))
+        application.add_handler(CallbackQueryHandler(
+            leaderboard_handler.show_leaderboard,
+            pattern="^top_"
+        ))
         application.add_handler(CallbackQueryHandler(
             start_handler.handle_main_menu,
             pattern="^menu_"
@@ -120,13 +152,29 @@ class LanguageLearningBot:
         """Setup periodic jobs for notifications and maintenance"""
         job_queue = application.job_queue
         
-        # Check for inactive users every hour
+        # Send due streak reminders; each user has a slot within the hour,
+        # so frequent small runs spread the sends out
         job_queue.run_repeating(
             self.notification_manager.check_inactive_users,
-            interval=timedelta(hours=1),
+            interval=timedelta(minutes=self.config.REMINDER_CHECK_MINUTES),
             first=timedelta(seconds=10)
         )
         
+        # Deliver queued notifications in batches
+        job_queue.run_repeating(
+            self.notification_manager.deliver_outbox,
+            interval=timedelta(seconds=self.config.OUTBOX_DRAIN_SECONDS),
+            first=timedelta(seconds=15)
+        )
+        
+        # Pick up edited lesson content without a restart
+        if self.config.LESSON_RELOAD_SECONDS > 0:
+            job_queue.run_repeating(
+                self.lesson_manager.reload_if_changed,
+                interval=timedelta(seconds=self.config.LESSON_RELOAD_SECONDS),
+                first=timedelta(seconds=self.config.LESSON_RELOAD_SECONDS)
+            )
+        
         # Daily cleanup job (midnight UTC)
         job_queue.run_daily(
             self.daily_maintenance,
@@ -138,12 +186,19 @@ class LanguageLearningBot:
     async def daily_maintenance(self, context: ContextTypes.DEFAULT_TYPE):
         """Daily maintenance tasks"""
         try:
-            # Reset daily challenges, update streaks, etc.
-            await self.user_manager.reset_hearts_for_all()
+            # Hearts need no reset here: they regenerate lazily on read
+            # (UserManager._effective_hearts), including the daily refill.
+            await self.user_manager.compact_rollups(self.config.LEADERBOARD_WEEKS_RETAINED)
+            await self.notification_manager.outbox.cleanup(self.config.OUTBOX_RETENTION_HOURS)
             logger.info("✅ Daily maintenance completed")
         except Exception as e:
             logger.error(f"❌ Daily maintenance failed: {e}")
     
+    async def shutdown(self, application: Application):
+        """Flush pending writes and close the database on shutdown"""
+        if self.db_manager:
+            await self.db_manager.close()
+    
     async def run(self):
         """Start the bot"""
         try:
@@ -154,6 +209,7 @@ class LanguageLearningBot:
             application = (
                 Application.builder()
                 .token(self.config.BOT_TOKEN)
+                .post_shutdown(self.shutdown)
                 .build()
             )
             
@@ -0,0 +1,84 @@
+"""
+Lesson Bundle Builder
+Compiles lesson content into a bundle the bot loads one unit at a time
+
+Usage:
+    python build_lessons.py [source] [output.bundle]
+        source is a JSON catalog or a <language>/<unit>.json shard directory;
+        then set LESSONS_PATH to the output file.
+    python build_lessons.py --split [catalog.json] [directory]
+        writes a JSON catalog out as a shard directory.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from managers.lesson_bundle import LessonBundle, compile_bundle
+from managers.lesson_manager import read_shards
+from managers.lesson_schema import validate_lessons
+
+
+def load_source(source: str) -> Tuple[Dict[str, Any], int]:
+    """Read and validate a catalog; returns it with its size on disk"""
+    if Path(source).is_dir():
+        lessons_data, raw_shards, errors = read_shards(source)
+        for (language, unit), error in errors.items():
+            print(f"❌ Invalid shard {language}/{unit}: {error}")
+        if errors:
+            sys.exit(1)
+        return lessons_data, sum(len(raw) for raw in raw_shards.values())
+    
+    raw = Path(source).read_bytes()
+    lessons_data = json.loads(raw)
+    try:
+        validate_lessons(lessons_data)
+    except ValueError as e:
+        print(f"❌ Invalid lessons in {source}: {e}")
+        sys.exit(1)
+    return lessons_data, len(raw)
+
+
+def split(source: str, directory: str):
+    """Write each unit of a catalog to <directory>/<language>/<unit>.json"""
+    lessons_data, _ = load_source(source)
+    for language, units in lessons_data.items():
+        for unit, lessons in units.items():
+            shard = Path(directory) / language / f"{unit}.json"
+            shard.parent.mkdir(parents=True, exist_ok=True)
+            shard.write_text(json.dumps(lessons, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"✅ Wrote {sum(len(units) for units in lessons_data.values())} shards to {directory}")
+
+
+def build(source: str, output: str):
+    """Build the bundle and report its size and load times"""
+    started = time.perf_counter()
+    lessons_data, source_bytes = load_source(source)
+    parse_ms = (time.perf_counter() - started) * 1000
+    
+    metrics = compile_bundle(lessons_data, output)
+    print(f"✅ Wrote {output}: {metrics['bytes']:,} bytes "
+          f"({metrics['bytes'] / source_bytes:.0%} of {source}), {metrics['units']} units")
+    
+    # Compare startup cost: full parse and validation vs opening the bundle
+    started = time.perf_counter()
+    bundle = LessonBundle(output)
+    open_ms = (time.perf_counter() - started) * 1000
+    bundle.close()
+    print(f"⏱️ Full parse {parse_ms:.2f} ms, bundle open {open_ms:.2f} ms")
+
+
+def main():
+    """Entry point"""
+    args = sys.argv[1:]
+    if args and args[0] == "--split":
+        split(args[1] if len(args) > 1 else "data/lessons.json",
+              args[2] if len(args) > 2 else "data/lessons")
+    else:
+        build(args[0] if args else "data/lessons.json",
+              args[1] if len(args) > 1 else "data/lessons.bundle")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,19 @@ class Config:
     
     # Database Configuration
     DB_PATH = os.getenv("DB_PATH", "language_bot.db")
+    DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+    DB_GROUP_COMMIT_WINDOW_MS = float(os.getenv("DB_GROUP_COMMIT_WINDOW_MS", "5"))
+    DB_GROUP_COMMIT_MAX_BATCH = int(os.getenv("DB_GROUP_COMMIT_MAX_BATCH", "100"))
+    DB_QUERY_STATS = os.getenv("DB_QUERY_STATS", "false").lower() in ("1", "true", "yes")
+    DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+    DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "FULL")
+    
+    # Cache Configuration
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+    RANK_IN_MEMORY = os.getenv("RANK_IN_MEMORY", "true").lower() in ("1", "true", "yes")
     
     # Game Configuration
     MAX_HEARTS = 5
@@ -23,8 +36,26 @@ class Config:
     XP_PER_CORRECT_ANSWER = 10
     XP_PER_LESSON_COMPLETE = 50
     STREAK_NOTIFICATION_HOURS = 24
+    REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+    REMINDER_CHECK_MINUTES = int(os.getenv("REMINDER_CHECK_MINUTES", "5"))
+    
+    # Broadcast Configuration (Telegram allows ~30 messages/second overall)
+    BROADCAST_RATE_PER_SECOND = float(os.getenv("BROADCAST_RATE_PER_SECOND", "25"))
+    BROADCAST_PER_CHAT_INTERVAL = float(os.getenv("BROADCAST_PER_CHAT_INTERVAL", "1.0"))
+    BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "8"))
+    BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+    
+    # Notification Outbox
+    OUTBOX_DRAIN_SECONDS = int(os.getenv("OUTBOX_DRAIN_SECONDS", "15"))
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_RETENTION_HOURS = int(os.getenv("OUTBOX_RETENTION_HOURS", "48"))
+    LEADERBOARD_WEEKS_RETAINED = int(os.getenv("LEADERBOARD_WEEKS_RETAINED", "8"))
     
     # Lesson Configuration
+    LESSONS_PATH = os.getenv("LESSONS_PATH", "data/lessons.json")  # JSON, shard directory or .bundle
+    LESSON_CARD_CACHE_SIZE = int(os.getenv("LESSON_CARD_CACHE_SIZE", "2000"))
+    LESSON_RELOAD_SECONDS = int(os.getenv("LESSON_RELOAD_SECONDS", "30"))  # 0 disables hot reload
     LANGUAGES = {
         "english": {
             "name": "English 🇬🇧",
@@ -46,13 +77,15 @@ class Config:
     UNITS = ["beginner", "intermediate", "advanced"]
     
     # Achievements
+    # Each achievement unlocks once its counter reaches the requirement.
+    # Counters: lessons_completed, best_streak, perfect_quizzes
     ACHIEVEMENTS = {
-        "first_lesson": {"name": "🎓 First Steps", "xp": 100, "requirement": 1},
-        "streak_7": {"name": "🔥 Week Warrior", "xp": 200, "requirement": 7},
-        "streak_30": {"name": "🏆 Monthly Master", "xp": 500, "requirement": 30},
-        "lessons_10": {"name": "📚 Bookworm", "xp": 300, "requirement": 10},
-        "lessons_50": {"name": "🌟 Scholar", "xp": 1000, "requirement": 50},
-        "perfect_quiz": {"name": "💯 Perfect Score", "xp": 150, "requirement": 1}
+        "first_lesson": {"name": "🎓 First Steps", "xp": 100, "requirement": 1, "counter": "lessons_completed"},
+        "streak_7": {"name": "🔥 Week Warrior", "xp": 200, "requirement": 7, "counter": "best_streak"},
+        "streak_30": {"name": "🏆 Monthly Master", "xp": 500, "requirement": 30, "counter": "best_streak"},
+        "lessons_10": {"name": "📚 Bookworm", "xp": 300, "requirement": 10, "counter": "lessons_completed"},
+        "lessons_50": {"name": "🌟 Scholar", "xp": 1000, "requirement": 50, "counter": "lessons_completed"},
+        "perfect_quiz": {"name": "💯 Perfect Score", "xp": 150, "requirement": 1, "counter": "perfect_quizzes"}
     }
     
     @classmethod
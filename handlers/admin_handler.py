@@ -8,6 +8,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from managers.user_manager import UserManager
 from config import Config
+from utils.formatter import truncate_text
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +40,8 @@ class AdminHandler:
             import os
             os.makedirs("backups", exist_ok=True)
             
-            # Copy database
+            # Flush the WAL so the main file is complete, then copy it
+            await self.user_manager.db.checkpoint()
             shutil.copy2(self.config.DB_PATH, backup_path)
             
             # Send backup file
@@ -81,10 +83,12 @@ class AdminHandler:
             backup_current = f"backups/before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
             import os
             os.makedirs("backups", exist_ok=True)
+            await self.user_manager.db.checkpoint()
             shutil.copy2(self.config.DB_PATH, backup_current)
             
-            # Restore
-            shutil.copy2(restore_path, self.config.DB_PATH)
+            # Restore: reopens the database, then drops state cached from the old one
+            await self.user_manager.db.restore(restore_path)
+            await self.user_manager.reset_caches()
             
             # Cleanup
             os.remove(restore_path)
@@ -99,3 +103,46 @@ class AdminHandler:
         except Exception as e:
             logger.error(f"❌ Restore failed: {e}")
             await update.message.reply_text(f"❌ Restore failed: {str(e)}")
+    
+    async def db_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Show database pool, commit and per-query statistics"""
+        user_id = update.effective_user.id
+        
+        if not self._is_admin(user_id):
+            await update.message.reply_text("⛔️ Unauthorized. Admin only.")
+            return
+        
+        db = self.user_manager.db
+        pool = db.get_pool_stats()
+        commits = db.get_commit_stats()
+        
+        lines = [
+            "📊 Database Stats",
+            "",
+            f"Readers: {pool['in_use']}/{pool['size']} in use, "
+            f"{pool['waits']} waits (avg {pool['avg_wait_ms']:.1f} ms, max {pool['max_wait_ms']:.1f} ms)",
+            f"Group commit: {'on' if commits['enabled'] else 'off'}, "
+            f"{commits['batches']} batches (avg size {commits['avg_batch_size']:.1f}, "
+            f"avg commit {commits['avg_commit_ms']:.1f} ms)"
+        ]
+        
+        cache = self.user_manager.user_cache.get_stats()
+        lines.append(
+            f"User cache: {cache['size']}/{cache['max_size']} entries, "
+            f"hit rate {cache['hit_rate']:.0%}, {cache['evictions']} evictions"
+        )
+        
+        if db.query_stats is None:
+            lines.append("\nQuery stats disabled (set DB_QUERY_STATS=true)")
+        else:
+            lines.append("\nTop queries by total time:")
+            for stat in db.query_stats.get_stats(limit=10):
+                lines.append(
+                    f"\n{stat['calls']}x total {stat['total_ms']:.0f} ms, "
+                    f"p50 {stat['p50_ms']:.2f} / p95 {stat['p95_ms']:.2f} / p99 {stat['p99_ms']:.2f} ms, "
+                    f"{stat['rows']} rows\n{truncate_text(stat['query'], 200)}"
+                )
+            slow = db.query_stats.get_slow_queries()
+            lines.append(f"\nSlow queries logged: {len(slow)}")
+        
+        await update.message.reply_text(truncate_text("\n".join(lines), 4000))
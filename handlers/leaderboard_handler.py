@@ -2,70 +2,88 @@
 Leaderboard Handler - Displays top users
 """
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
-from managers.user_manager import UserManager
-from utils.formatter import escape_markdown
+from managers.user_manager import UserManager, ALL, week_period
+from config import Config
+from utils.formatter import MessageTemplate
+from utils.keyboards import KEYBOARDS
 
 logger = logging.getLogger(__name__)
 
+EMPTY_BOARD = MessageTemplate(
+    "🏆 *Leaderboard* ({board})\n\n"
+    "No XP earned here yet. Be the first!"
+)
+BOARD = MessageTemplate("🏆 *Top 10 Learners* ({board})\n\n{rows:raw}{rank:raw}")
+BOARD_ROW = MessageTemplate("{medal} {name}\n   ⭐️ {xp} XP • 🔥 {streak} days\n\n")
+BOARD_RANK = MessageTemplate("*Your Rank:* #{rank}\nYour XP: {xp}")
+
 
 class LeaderboardHandler:
     """Handles leaderboard display"""
     
     def __init__(self, user_manager: UserManager):
         self.user_manager = user_manager
+        self.config = Config()
     
     async def show_leaderboard(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Display top 10 users"""
+        """Display top 10 users (all-time, this week, or per language)"""
+        scope, language = "all", ALL
         if update.callback_query:
             query = update.callback_query
             await query.answer()
+            if query.data.startswith("top_"):
+                _, scope, language = query.data.split("_", 2)
+        
+        period = week_period() if scope == "week" else ALL
         
         # Get top users
-        top_users = await self.user_manager.get_leaderboard(10)
+        top_users = await self.user_manager.get_leaderboard(10, period=period, language=language)
+        
+        board_name = "This Week" if scope == "week" else "All Time"
+        if language != ALL and language in self.config.LANGUAGES:
+            board_name += f" • {self.config.LANGUAGES[language]['name']}"
         
         if not top_users:
-            text = "🏆 *Leaderboard*\n\nNo users yet\\. Be the first\\!"
+            text = EMPTY_BOARD.render(board=board_name)
         else:
-            text = "🏆 *Top 10 Learners*\n\n"
-            
             medals = ["🥇", "🥈", "🥉"]
+            rows = "".join(
+                BOARD_ROW.render(
+                    medal=medals[idx - 1] if idx <= 3 else f"{idx}.",
+                    name=user['first_name'] or user['username'] or 'User',
+                    xp=user['xp'],
+                    streak=user['streak']
+                )
+                for idx, user in enumerate(top_users, 1)
+            )
             
-            for idx, user in enumerate(top_users, 1):
-                medal = medals[idx - 1] if idx <= 3 else f"{idx}\\."
-                name = escape_markdown(user['first_name'] or user['username'] or 'User')
-                xp = user['xp']
-                streak = user['streak']
-                
-                text += f"{medal} {name}\n"
-                text += f"   ⭐️ {xp} XP • 🔥 {streak} days\n\n"
-            
-            # Show current user's rank
+            # Show current user's rank on this board
             user_id = update.effective_user.id
-            user = await self.user_manager.get_or_create_user(user_id)
-            
-            # Calculate user's rank
-            all_users = await self.user_manager.db.fetch_all(
-                "SELECT user_id FROM users ORDER BY xp DESC"
-            )
-            user_rank = next((i + 1 for i, u in enumerate(all_users) if u['user_id'] == user_id), None)
+            user_rank = await self.user_manager.get_user_rank(user_id, period=period, language=language)
+            rank = BOARD_RANK.render(rank=user_rank['rank'], xp=user_rank['xp']) if user_rank else ""
             
-            if user_rank:
-                text += f"*Your Rank:* #{user_rank}\n"
-                text += f"Your XP: {user['xp']}"
+            text = BOARD.render(board=board_name, rows=rows, rank=rank)
         
-        keyboard = [[InlineKeyboardButton("🏠 Main Menu", callback_data="menu_main")]]
+        keyboard = KEYBOARDS.dynamic(("leaderboard", scope, language), lambda: [
+            [("🏆 All Time", f"top_all_{language}"), ("📅 This Week", f"top_week_{language}")],
+            [
+                ("🌍 All" if code == ALL else lang['name'].split()[-1], f"top_{scope}_{code}")
+                for code, lang in [(ALL, None)] + list(self.config.LANGUAGES.items())
+            ],
+            [("🏠 Main Menu", "menu_main")]
+        ])
         
         if update.callback_query:
             await update.callback_query.edit_message_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=keyboard,
                 parse_mode="MarkdownV2"
             )
         else:
             await update.message.reply_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=keyboard,
                 parse_mode="MarkdownV2"
             )
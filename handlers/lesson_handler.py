@@ -2,23 +2,63 @@
 Lesson Handler - Manages lesson browsing and selection
 """
 import logging
+from typing import Any, Dict, NamedTuple, Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from managers.user_manager import UserManager
-from managers.lesson_manager import LessonManager
+from managers.lesson_manager import LessonManager, LessonSnapshot
 from config import Config
-from utils.formatter import escape_markdown, create_progress_bar
+from utils.cache import LRUCache
+from utils.formatter import MessageTemplate, create_progress_bar
+from utils.keyboards import KEYBOARDS, back_btn, back_row
 
 logger = logging.getLogger(__name__)
 
+LANGUAGE_MENU = MessageTemplate(
+    "*📚 Choose Your Language*\n\n"
+    "Select which language you want to learn:\n"
+    "All lessons are translated to Myanmar 🇲🇲"
+)
+UNIT_MENU = MessageTemplate(
+    "*{language} Lessons*\n\n"
+    "📊 Completed: {completed} lessons\n\n"
+    "Select your level:"
+)
+LESSON_MENU = MessageTemplate("*{unit} Lessons*\n\nSelect a lesson:")
+NO_LESSONS = MessageTemplate("*{unit} Level*\n\nNo lessons available yet. Coming soon! 🚧")
+
+CARD_HEAD = MessageTemplate("*{title}*\n")
+CARD_BODY = MessageTemplate(
+    "_{description}_\n\n"
+    "*Vocabulary:*\n\n"
+    "{words:raw}\n\n"
+    "*Ready to test your knowledge?*"
+)
+CARD_WORD = MessageTemplate("• {word} - {translation}")
+CARD_WORD_READING = MessageTemplate("• {word} ({reading}) - {translation}")
+CARD_STATUS = MessageTemplate("❤️ {hearts}/{max_hearts}{badge:raw}\n\n")
+COMPLETED_BADGE = MessageTemplate("  ✅ Completed (best {score}%)")
+
+
+class LessonCard(NamedTuple):
+    """Pre-rendered lesson view; only the status line between head and body is per user"""
+    head: str
+    body: str
+    reply_markup: InlineKeyboardMarkup
+
 
 class LessonHandler:
     """Handles lesson navigation and content display"""
     
-    def __init__(self, user_manager: UserManager):
+    def __init__(self, user_manager: UserManager,
+                 lesson_manager: Optional[LessonManager] = None):
         self.user_manager = user_manager
-        self.lesson_manager = LessonManager()
+        # Shared content registry (loaded once in bot.initialize)
+        self.lesson_manager = lesson_manager or LessonManager()
         self.config = Config()
+        # Rendered cards by (content digest, language, unit, lesson id); a
+        # content reload changes the digest, so entries never go stale
+        self.card_cache = LRUCache(self.config.LESSON_CARD_CACHE_SIZE, ttl_seconds=float("inf"))
     
     async def learn_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show language selection menu"""
@@ -29,33 +69,18 @@ class LessonHandler:
         else:
             user_id = update.effective_user.id
         
-        text = (
-            "*📚 Choose Your Language*\n\n"
-            "Select which language you want to learn:\n"
-            "All lessons are translated to Myanmar 🇲🇲"
-        )
-        
-        keyboard = []
-        for lang_code, lang_data in self.config.LANGUAGES.items():
-            keyboard.append([
-                InlineKeyboardButton(
-                    lang_data['name'],
-                    callback_data=f"lang_{lang_code}"
-                )
-            ])
-        
-        keyboard.append([InlineKeyboardButton("🏠 Main Menu", callback_data="menu_main")])
+        text = LANGUAGE_MENU.render()
         
         if update.callback_query:
             await update.callback_query.edit_message_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=KEYBOARDS.get("languages"),
                 parse_mode="MarkdownV2"
             )
         else:
             await update.message.reply_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=KEYBOARDS.get("languages"),
                 parse_mode="MarkdownV2"
             )
     
@@ -68,10 +93,7 @@ class LessonHandler:
         context.user_data['selected_language'] = language
         
         # Update user's current language
-        await self.user_manager.db.execute(
-            "UPDATE users SET current_language = ? WHERE user_id = ?",
-            (language, update.effective_user.id)
-        )
+        await self.user_manager.set_current_language(update.effective_user.id, language)
         
         # Show units
         await self._show_units(query, language)
@@ -82,24 +104,17 @@ class LessonHandler:
         
         # Get user progress
         user_id = query.from_user.id
-        progress = await self.user_manager.get_user_progress(user_id, language)
+        summary = await self.user_manager.get_progress_summary(user_id)
+        progress = summary.get(language, {"total_lessons": 0, "units": {}})
         
-        text = (
-            f"*{escape_markdown(lang_name)} Lessons*\n\n"
-            f"📊 Completed: {progress['total_lessons']} lessons\n\n"
-            f"Select your level:"
-        )
+        text = UNIT_MENU.render(language=lang_name, completed=progress['total_lessons'])
         
         keyboard = []
         for unit in self.config.UNITS:
-            unit_lessons = self.lesson_manager.get_lessons(language, unit)
-            if unit_lessons:
-                # Count completed lessons in this unit
-                completed_in_unit = len([
-                    l for l in progress['lessons'] 
-                    if l['unit'] == unit
-                ])
-                total_in_unit = len(unit_lessons)
+            total_in_unit = self.lesson_manager.count_lessons(language, unit)
+            if total_in_unit:
+                unit_progress = progress['units'].get(unit)
+                completed_in_unit = unit_progress['lessons_completed'] if unit_progress else 0
                 progress_bar = create_progress_bar(completed_in_unit, total_in_unit)
                 
                 keyboard.append([
@@ -110,7 +125,7 @@ class LessonHandler:
                     )
                 ])
         
-        keyboard.append([InlineKeyboardButton("← Back", callback_data="menu_learn")])
+        keyboard.append(back_row("menu_learn", "← Back"))
         
         await query.edit_message_text(
             text,
@@ -130,26 +145,22 @@ class LessonHandler:
         
         if not lessons:
             await query.edit_message_text(
-                f"*{unit.title()} Level*\n\n"
-                f"No lessons available yet\\. Coming soon\\! 🚧",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("← Back", callback_data=f"lang_{language}")
-                ]]),
+                NO_LESSONS.render(unit=unit.title()),
+                reply_markup=back_btn(f"lang_{language}", "← Back"),
                 parse_mode="MarkdownV2"
             )
             return
         
-        text = f"*{unit.title()} Lessons*\n\nSelect a lesson:"
+        text = LESSON_MENU.render(unit=unit.title())
+        
+        # Completion status for the whole unit in one query
+        lessons_status = await self.user_manager.get_lessons_status(
+            query.from_user.id, language, unit, [lesson['id'] for lesson in lessons]
+        )
         
         keyboard = []
         for lesson in lessons:
-            # Check if completed
-            progress = await self.user_manager.db.fetch_one(
-                """SELECT completed, score FROM progress 
-                   WHERE user_id = ? AND language = ? AND unit = ? AND lesson_id = ?""",
-                (query.from_user.id, language, unit, lesson['id'])
-            )
-            
+            progress = lessons_status.get(lesson['id'])
             status = "✅" if progress and progress['completed'] else "📝"
             score_text = f" ({progress['score']}%)" if progress and progress['completed'] else ""
             
@@ -160,7 +171,7 @@ class LessonHandler:
                 )
             ])
         
-        keyboard.append([InlineKeyboardButton("← Back", callback_data=f"lang_{language}")])
+        keyboard.append(back_row(f"lang_{language}", "← Back"))
         
         await query.edit_message_text(
             text,
@@ -175,9 +186,9 @@ class LessonHandler:
         
         _, language, unit, lesson_id = query.data.split("_", 3)
         
-        lesson = self.lesson_manager.get_lesson(language, unit, lesson_id)
+        card = self._lesson_card(self.lesson_manager.snapshot, language, unit, lesson_id)
         
-        if not lesson:
+        if not card:
             await query.answer("Lesson not found!", show_alert=True)
             return
         
@@ -190,136 +201,59 @@ class LessonHandler:
             )
             return
         
-        # Build lesson content
-        text = f"*{escape_markdown(lesson['title'])}*\n\n"
-        text += f"_{escape_markdown(lesson['description'])}_\n\n"
-        text += "*Vocabulary:*\n\n"
-        
+        status = await self.user_manager.get_lessons_status(user['user_id'], language, unit, [lesson_id])
+        await query.edit_message_text(
+            self._compose_card(card, user['hearts'], status.get(lesson_id)),
+            reply_markup=card.reply_markup,
+            parse_mode="MarkdownV2"
+        )
+    
+    def _lesson_card(self, snapshot: LessonSnapshot, language: str, unit: str,
+                     lesson_id: str) -> Optional[LessonCard]:
+        """Get the rendered card for a lesson, rendering it once per content version"""
+        key = (snapshot.digest, language, unit, lesson_id)
+        card = self.card_cache.get(key)
+        if card is None:
+            lesson = snapshot.get_lesson(language, unit, lesson_id)
+            if not lesson:
+                return None
+            card = self._render_card(language, unit, lesson)
+            self.card_cache.set(key, card)
+        return card
+    
+    @staticmethod
+    def _render_card(language: str, unit: str, lesson: Dict[str, Any]) -> LessonCard:
+        """Escape and lay out the static part of a lesson card"""
+        words = []
         for item in lesson['vocabulary'][:5]:  # Show first 5 words
-            word = escape_markdown(item['word'])
-            translation = escape_markdown(item['translation'])
-            
             if language == 'japanese' and 'furigana' in item:
-                furigana = escape_markdown(item['furigana'])
-                text += f"• {word} \\({furigana}\\) \\- {translation}\n"
+                words.append(CARD_WORD_READING.render(
+                    word=item['word'], reading=item['furigana'], translation=item['translation']
+                ))
             elif language == 'korean' and 'romanization' in item:
-                roman = escape_markdown(item['romanization'])
-                text += f"• {word} \\({roman}\\) \\- {translation}\n"
+                words.append(CARD_WORD_READING.render(
+                    word=item['word'], reading=item['romanization'], translation=item['translation']
+                ))
             else:
-                text += f"• {word} \\- {translation}\n"
-        
-        text += f"\n*Ready to test your knowledge?*"
+                words.append(CARD_WORD.render(word=item['word'], translation=item['translation']))
         
+        lesson_id = lesson['id']
         keyboard = [
             [InlineKeyboardButton("🎯 Start Quiz", callback_data=f"quiz_{language}_{unit}_{lesson_id}")],
-            [InlineKeyboardButton("← Back", callback_data=f"unit_{language}_{unit}")]
+            back_row(f"unit_{language}_{unit}", "← Back")
         ]
-        
-        await query.edit_message_text(
-            text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode="MarkdownV2"
-        )#  YES / NO
-# ─────────────────────────────────────────
-def yes_no(yes_data: str, no_data: str):
-    return Markup([[Btn("✅ Yes", callback_data=yes_data), Btn("❌ No", callback_data=no_data)]])
-
-# ─────────────────────────────────────────
-#  BACK BUTTON
-# ─────────────────────────────────────────
-def back_btn(target: str = "menu_main"):
-    return Markup([[Btn("◀️ Back to Menu", callback_data=target)]])
-
-# ─────────────────────────────────────────
-#  LEARNING MENUS
-# ─────────────────────────────────────────
-def learn_menu():
-    return Markup([
-        [Btn("📅 Daily Lesson", callback_data="learn_daily"),
-         Btn("🗺️ Learning Path", callback_data="learn_path")],
-        [Btn("🎧 Listening", callback_data="learn_listen"),
-         Btn("🔄 Review",    callback_data="learn_review")],
-        [Btn("◀️ Menu",      callback_data="menu_main")],
-    ])
-
-def vocab_menu():
-    return Markup([
-        [Btn("📖 Daily Words",   callback_data="vocab_daily"),
-         Btn("🗂️ My Deck",       callback_data="vocab_deck")],
-        [Btn("🃏 Flashcards",    callback_data="vocab_flash"),
-         Btn("📥 Review Due",    callback_data="vocab_review")],
-        [Btn("◀️ Menu",          callback_data="menu_main")],
-    ])
-
-def quiz_menu():
-    return Markup([
-        [Btn("🎲 Random Quiz",   callback_data="quiz_random"),
-         Btn("⚡ Challenge",      callback_data="quiz_challenge")],
-        [Btn("📝 Level Exam",    callback_data="quiz_exam"),
-         Btn("🏆 Leaderboard",   callback_data="quiz_tops")],
-        [Btn("◀️ Menu",          callback_data="menu_main")],
-    ])
-
-def social_menu():
-    return Markup([
-        [Btn("👥 Study Groups",  callback_data="social_groups"),
-         Btn("⚔️ Duel",          callback_data="social_duel")],
-        [Btn("🃏 Share Card",    callback_data="social_share"),
-         Btn("◀️ Menu",          callback_data="menu_main")],
-    ])
-
-def settings_menu():
-    return Markup([
-        [Btn("🌍 Change Language", callback_data="settings_lang"),
-         Btn("🎯 Daily Goal",      callback_data="settings_goal")],
-        [Btn("👤 Profile",         callback_data="settings_profile"),
-         Btn("◀️ Menu",            callback_data="menu_main")],
-    ])
-
-def tutor_menu():
-    return Markup([
-        [Btn("💬 Free Chat",       callback_data="tutor_chat"),
-         Btn("🎭 Roleplay",        callback_data="tutor_roleplay")],
-        [Btn("✏️ Grammar Check",   callback_data="tutor_grammar"),
-         Btn("🔁 Shadowing",       callback_data="tutor_shadow")],
-        [Btn("◀️ Menu",            callback_data="menu_main")],
-    ])
-
-def roleplay_picker():
-    # handle dynamic import to avoid circular dependency
-    try:
-        from lessons_data import ROLEPLAY_SCENARIOS
-    except ImportError:
-        ROLEPLAY_SCENARIOS = {}
-        
-    rows = []
-    items = list(ROLEPLAY_SCENARIOS.items())
-    for i in range(0, len(items), 2):
-        row = []
-        for key, info in items[i:i+2]:
-            row.append(Btn(info["title"], callback_data=f"roleplay:{key}"))
-        rows.append(row)
-    rows.append([Btn("◀️ Back", callback_data="menu_tutor")])
-    return Markup(rows)
-
-def goal_picker():
-    options = [5, 10, 15, 20, 30, 45, 60]
-    rows = []
-    for i in range(0, len(options), 3):
-        row = [Btn(f"⏱ {m} min", callback_data=f"goal:{m}") for m in options[i:i+3]]
-        rows.append(row)
-    rows.append([Btn("◀️ Back", callback_data="menu_settings")])
-    return Markup(rows)
-
-def flashcard_rating(vocab_id: int):
-    return Markup([[
-        Btn("😰 Hard (1)",  callback_data=f"fc:{vocab_id}:1"),
-        Btn("🤔 OK (3)",    callback_data=f"fc:{vocab_id}:3"),
-        Btn("😄 Easy (5)",  callback_data=f"fc:{vocab_id}:5"),
-    ]])
-
-def duel_invite(duel_id: int):
-    return Markup([[
-        Btn("⚔️ Accept", callback_data=f"duel_accept:{duel_id}"),
-        Btn("❌ Decline", callback_data=f"duel_decline:{duel_id}"),
-    ]])
+        return LessonCard(
+            CARD_HEAD.render(title=lesson['title']),
+            CARD_BODY.render(description=lesson['description'], words="\n".join(words)),
+            InlineKeyboardMarkup(keyboard)
+        )
+    
+    def _compose_card(self, card: LessonCard, hearts: int,
+                      status: Optional[Dict[str, Any]]) -> str:
+        """Splice the per-user status line into a rendered card"""
+        badge = COMPLETED_BADGE.render(score=status['score']) if status and status['completed'] else ""
+        return "".join((
+            card.head,
+            CARD_STATUS.render(hearts=hearts, max_hearts=self.config.MAX_HEARTS, badge=badge),
+            card.body
+        ))
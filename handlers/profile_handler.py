@@ -2,14 +2,40 @@
 Profile Handler - Manages user profile and statistics
 """
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from managers.user_manager import UserManager
 from config import Config
-from utils.formatter import escape_markdown
+from utils.formatter import MessageTemplate
+from utils.keyboards import KEYBOARDS
 
 logger = logging.getLogger(__name__)
 
+PROFILE = MessageTemplate(
+    "👤 *Profile: {name}*\n\n"
+    "🎚 Level: {level}\n"
+    "⭐️ XP: {xp} ({xp_for_next} to next level)\n"
+    "{hearts_display} Hearts: {hearts}/{max_hearts}\n"
+    "🔥 Streak: {streak} days\n"
+    "📚 Lessons Completed: {lessons}\n\n"
+    "*🏆 Achievements:*\n{achievements:raw}"
+)
+ACHIEVEMENT_LINE = MessageTemplate("{name}\n")
+NO_ACHIEVEMENTS = MessageTemplate("_No achievements yet_")
+
+DETAILED_STATS = MessageTemplate(
+    "📊 *Detailed Statistics*\n\n"
+    "*Progress by Language:*\n{languages:raw}\n\n"
+    "*Recent Activity:*\n{recent:raw}\n\n"
+    "*Account Info:*\n"
+    "Joined: {joined}\n"
+    "Username: @{username}"
+)
+LANGUAGE_LINE = MessageTemplate("{name}: {lessons} lessons")
+RECENT_LINE = MessageTemplate("• {lesson_id}: {score}%\n")
+NO_LESSONS = MessageTemplate("_No lessons completed_")
+NO_ACTIVITY = MessageTemplate("_No recent activity_")
+
 
 class ProfileHandler:
     """Handles user profile display and actions"""
@@ -33,20 +59,18 @@ class ProfileHandler:
         
         # Get achievements
         achievements = await self.user_manager.get_achievements(user_id)
-        achievement_text = ""
         if achievements:
-            for ach_id in achievements[:5]:  # Show first 5
-                if ach_id in self.config.ACHIEVEMENTS:
-                    ach = self.config.ACHIEVEMENTS[ach_id]
-                    achievement_text += f"{ach['name']}\n"
+            achievement_text = "".join(
+                ACHIEVEMENT_LINE.render(name=self.config.ACHIEVEMENTS[ach_id]['name'])
+                for ach_id in achievements[:5]  # Show first 5
+                if ach_id in self.config.ACHIEVEMENTS
+            )
         else:
-            achievement_text = "_No achievements yet_"
+            achievement_text = NO_ACHIEVEMENTS.render()
         
         # Get progress stats
-        total_lessons = await self.user_manager.db.fetch_one(
-            "SELECT COUNT(*) as count FROM progress WHERE user_id = ? AND completed = 1",
-            (user_id,)
-        )
+        summary = await self.user_manager.get_progress_summary(user_id)
+        total_lessons = sum(progress['total_lessons'] for progress in summary.values())
         
         # Calculate level based on XP
         level = (user['xp'] // 100) + 1
@@ -54,35 +78,31 @@ class ProfileHandler:
         
         hearts_display = "❤️" * heart_info['hearts'] + "🖤" * (self.config.MAX_HEARTS - heart_info['hearts'])
         
-        text = (
-            f"👤 *Profile: {escape_markdown(user['first_name'] or 'User')}*\n\n"
-            f"🎚 Level: {level}\n"
-            f"⭐️ XP: {user['xp']} \\({xp_for_next} to next level\\)\n"
-            f"{hearts_display} Hearts: {heart_info['hearts']}/{self.config.MAX_HEARTS}\n"
-            f"🔥 Streak: {user['streak']} days\n"
-            f"📚 Lessons Completed: {total_lessons['count']}\n\n"
-            f"*🏆 Achievements:*\n{achievement_text}"
+        text = PROFILE.render(
+            name=user['first_name'] or 'User',
+            level=level,
+            xp=user['xp'],
+            xp_for_next=xp_for_next,
+            hearts_display=hearts_display,
+            hearts=heart_info['hearts'],
+            max_hearts=self.config.MAX_HEARTS,
+            streak=user['streak'],
+            lessons=total_lessons,
+            achievements=achievement_text
         )
         
-        keyboard = [
-            [InlineKeyboardButton(
-                f"🔔 Notifications: {'ON' if user['notification_enabled'] else 'OFF'}",
-                callback_data="profile_toggle_notif"
-            )],
-            [InlineKeyboardButton("📊 Detailed Stats", callback_data="profile_stats")],
-            [InlineKeyboardButton("🏠 Main Menu", callback_data="menu_main")]
-        ]
+        keyboard = KEYBOARDS.get(f"profile_notifications_{'on' if user['notification_enabled'] else 'off'}")
         
         if update.callback_query:
             await update.callback_query.edit_message_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=keyboard,
                 parse_mode="MarkdownV2"
             )
         else:
             await update.message.reply_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=keyboard,
                 parse_mode="MarkdownV2"
             )
     
@@ -99,10 +119,7 @@ class ProfileHandler:
             user = await self.user_manager.get_or_create_user(user_id)
             new_state = 0 if user['notification_enabled'] else 1
             
-            await self.user_manager.db.execute(
-                "UPDATE users SET notification_enabled = ? WHERE user_id = ?",
-                (new_state, user_id)
-            )
+            await self.user_manager.set_notifications(user_id, bool(new_state))
             
             await query.answer(
                 f"🔔 Notifications {'enabled' if new_state else 'disabled'}!",
@@ -121,16 +138,17 @@ class ProfileHandler:
         user = await self.user_manager.get_or_create_user(user_id)
         
         # Get progress by language
+        summary = await self.user_manager.get_progress_summary(user_id)
         languages_data = []
         for lang_code in self.config.LANGUAGES.keys():
-            progress = await self.user_manager.get_user_progress(user_id, lang_code)
-            if progress['total_lessons'] > 0:
-                lang_name = self.config.LANGUAGES[lang_code]['name']
-                languages_data.append(
-                    f"{lang_name}: {progress['total_lessons']} lessons"
-                )
+            progress = summary.get(lang_code)
+            if progress and progress['total_lessons'] > 0:
+                languages_data.append(LANGUAGE_LINE.render(
+                    name=self.config.LANGUAGES[lang_code]['name'],
+                    lessons=progress['total_lessons']
+                ))
         
-        lang_text = "\n".join(languages_data) if languages_data else "_No lessons completed_"
+        lang_text = "\n".join(languages_data) if languages_data else NO_LESSONS.render()
         
         # Get recent lessons
         recent = await self.user_manager.db.fetch_all(
@@ -140,26 +158,23 @@ class ProfileHandler:
             (user_id,)
         )
         
-        recent_text = ""
-        for item in recent:
-            recent_text += f"• {item['lesson_id']}: {item['score']}%\n"
+        recent_text = "".join(
+            RECENT_LINE.render(lesson_id=item['lesson_id'], score=item['score'])
+            for item in recent
+        )
         
         if not recent_text:
-            recent_text = "_No recent activity_"
-        
-        text = (
-            f"📊 *Detailed Statistics*\n\n"
-            f"*Progress by Language:*\n{lang_text}\n\n"
-            f"*Recent Activity:*\n{recent_text}\n\n"
-            f"*Account Info:*\n"
-            f"Joined: {escape_markdown(user['created_at'][:10])}\n"
-            f"Username: @{escape_markdown(user['username'] or 'N/A')}"
-        )
+            recent_text = NO_ACTIVITY.render()
         
-        keyboard = [[InlineKeyboardButton("← Back to Profile", callback_data="menu_profile")]]
+        text = DETAILED_STATS.render(
+            languages=lang_text,
+            recent=recent_text,
+            joined=user['created_at'][:10],
+            username=user['username'] or 'N/A'
+        )
         
         await query.edit_message_text(
             text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=KEYBOARDS.get("back_to_profile"),
             parse_mode="MarkdownV2"
         )
@@ -2,23 +2,42 @@
 Quiz Handler - Manages quiz sessions and answers
 """
 import logging
+from typing import Optional, Dict, Any
 import json
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from managers.user_manager import UserManager
 from managers.lesson_manager import LessonManager
 from config import Config
-from utils.formatter import escape_markdown
+from utils.formatter import MessageTemplate
+from utils.keyboards import KEYBOARDS, single_button
 
 logger = logging.getLogger(__name__)
 
+QUESTION = MessageTemplate("*Quiz Question {number}/{total}*\n{hearts}\n\n{question}")
+TYPE_ANSWER = MessageTemplate("\n\n_Type your answer:_")
+CORRECT = MessageTemplate("✅ *Correct!*\n\n+{xp} XP")
+INCORRECT = MessageTemplate("❌ *Incorrect!*\n\nCorrect answer: {answer}\n\n❤️ Hearts remaining: {hearts}")
+NO_HEARTS = MessageTemplate("\n\n⚠️ *No hearts left!* Come back later or wait for refill.")
+QUIZ_COMPLETE = MessageTemplate(
+    "🎊 *Quiz Complete!*\n\n"
+    "Score: {correct}/{total} ({score}%)\n"
+    "XP Earned: +{xp_earned}\n"
+    "Current XP: {xp}\n"
+    "Streak: {streak} days 🔥"
+    "{achievements:raw}"
+)
+ACHIEVEMENT_UNLOCKED = MessageTemplate("\n\n🎉 *Achievement Unlocked:* {name}")
+
 
 class QuizHandler:
     """Handles quiz sessions and answer validation"""
     
-    def __init__(self, user_manager: UserManager):
+    def __init__(self, user_manager: UserManager,
+                 lesson_manager: Optional[LessonManager] = None):
         self.user_manager = user_manager
-        self.lesson_manager = LessonManager()
+        # Shared content registry (loaded once in bot.initialize)
+        self.lesson_manager = lesson_manager or LessonManager()
         self.config = Config()
     
     async def handle_quiz_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -28,25 +47,46 @@ class QuizHandler:
         
         _, language, unit, lesson_id = query.data.split("_", 3)
         
-        # Get quiz questions
-        questions = self.lesson_manager.get_quiz_questions(language, unit, lesson_id)
+        # Get quiz questions, all from one content snapshot
+        snapshot = self.lesson_manager.snapshot
+        question_ids = snapshot.question_ids.get((language, unit, lesson_id), [])
+        questions = [snapshot.get_question(question_id) for question_id in question_ids]
         
         if not questions:
             await query.answer("No quiz available for this lesson!", show_alert=True)
             return
         
-        # Create quiz session
+        # Create quiz session (questions are referenced by id within the
+        # snapshot, so a content reload does not change a running quiz)
         user_id = query.from_user.id
         await self.user_manager.db.execute(
             """INSERT INTO quiz_sessions 
                (user_id, language, lesson_id, current_question, correct_answers, total_questions, session_data)
                VALUES (?, ?, ?, 0, 0, ?, ?)""",
-            (user_id, language, lesson_id, len(questions), json.dumps(questions))
+            (user_id, language, lesson_id, len(questions),
+             json.dumps({"content": snapshot.digest, "question_ids": question_ids}))
         )
         
         # Show first question
         await self._show_question(query, user_id, questions, 0, language, unit, lesson_id)
     
+    def _session_question(self, session_data: str, question_idx: int) -> Optional[Dict[str, Any]]:
+        """Get a question of a stored session (question ids, or legacy copied questions)"""
+        data = json.loads(session_data)
+        digest = None
+        if isinstance(data, list):
+            questions = data
+        else:
+            questions = data['question_ids']
+            digest = data.get('content')
+        if not 0 <= question_idx < len(questions):
+            return None
+        question = questions[question_idx]
+        if isinstance(question, int):
+            # None if the session's content version is no longer retained
+            return self.lesson_manager.get_question(question, digest)
+        return question
+    
     async def _show_question(self, query, user_id: int, questions: list, 
                             question_idx: int, language: str, unit: str, lesson_id: str):
         """Display a quiz question"""
@@ -61,30 +101,25 @@ class QuizHandler:
         user = await self.user_manager.get_or_create_user(user_id)
         hearts = "❤️" * user['hearts'] + "🖤" * (self.config.MAX_HEARTS - user['hearts'])
         
-        text = (
-            f"*Quiz Question {question_idx + 1}/{len(questions)}*\n"
-            f"{hearts}\n\n"
-            f"{escape_markdown(question['question'])}"
+        text = QUESTION.render(
+            number=question_idx + 1, total=len(questions), hearts=hearts, question=question['question']
         )
         
         if question['type'] == 'multiple_choice':
-            keyboard = []
-            for idx, option in enumerate(question['options']):
-                keyboard.append([
-                    InlineKeyboardButton(
-                        escape_markdown(option, for_button=True),
-                        callback_data=f"answer_{language}_{unit}_{lesson_id}_{question_idx}_{idx}"
-                    )
-                ])
+            options = tuple(str(option) for option in question['options'])
+            keyboard = KEYBOARDS.dynamic(("answers", language, unit, lesson_id, question_idx, options), lambda: [
+                [(option, f"answer_{language}_{unit}_{lesson_id}_{question_idx}_{idx}")]
+                for idx, option in enumerate(options)
+            ])
             
             await query.edit_message_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=keyboard,
                 parse_mode="MarkdownV2"
             )
         
         elif question['type'] == 'text_input':
-            text += "\n\n_Type your answer:_"
+            text += TYPE_ANSWER.render()
             
             # Store context for text answer
             context.user_data['awaiting_text_answer'] = {
@@ -95,11 +130,9 @@ class QuizHandler:
                 'correct_answer': question['answer']
             }
             
-            keyboard = [[InlineKeyboardButton("❌ Cancel", callback_data=f"unit_{language}_{unit}")]]
-            
             await query.edit_message_text(
                 text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                reply_markup=single_button("❌ Cancel", f"unit_{language}_{unit}"),
                 parse_mode="MarkdownV2"
             )
     
@@ -119,7 +152,7 @@ class QuizHandler:
         
         # Get session
         session = await self.user_manager.db.fetch_one(
-            """SELECT session_data, correct_answers FROM quiz_sessions 
+            """SELECT id, session_data FROM quiz_sessions 
                WHERE user_id = ? AND lesson_id = ? 
                ORDER BY id DESC LIMIT 1""",
             (user_id, lesson_id)
@@ -129,45 +162,44 @@ class QuizHandler:
             await query.answer("Session expired!", show_alert=True)
             return
         
-        questions = json.loads(session['session_data'])
-        question = questions[question_idx]
+        question = self._session_question(session['session_data'], question_idx)
+        if question is None:
+            await query.answer("Session expired!", show_alert=True)
+            return
         
         is_correct = user_answer == question['correct']
         
-        if is_correct:
-            # Correct answer
-            await self.user_manager.add_xp(user_id, self.config.XP_PER_CORRECT_ANSWER)
-            await self.user_manager.db.execute(
+        # Advance the session and apply the reward/penalty as one unit of work.
+        # The current_question guard makes a repeated tap on an already
+        # answered question a no-op instead of a second reward or penalty.
+        async with self.user_manager.db.transaction() as tx:
+            cursor = await tx.execute(
                 """UPDATE quiz_sessions 
-                   SET correct_answers = correct_answers + 1, current_question = ?
-                   WHERE user_id = ? AND lesson_id = ? 
-                   AND id = (SELECT MAX(id) FROM quiz_sessions WHERE user_id = ? AND lesson_id = ?)""",
-                (question_idx + 1, user_id, lesson_id, user_id, lesson_id)
+                   SET correct_answers = correct_answers + ?, current_question = ?
+                   WHERE id = ? AND current_question <= ?""",
+                (1 if is_correct else 0, question_idx + 1, session['id'], question_idx)
             )
+            if cursor.rowcount == 0:
+                return
             
-            feedback = "✅ *Correct!*\n\n+{} XP".format(self.config.XP_PER_CORRECT_ANSWER)
+            if is_correct:
+                await self.user_manager.add_xp(
+                    user_id, self.config.XP_PER_CORRECT_ANSWER, tx=tx, language=language
+                )
+            else:
+                hearts = await self.user_manager.lose_heart(user_id, tx=tx)
+        
+        if is_correct:
+            feedback = CORRECT.render(xp=self.config.XP_PER_CORRECT_ANSWER)
         else:
-            # Wrong answer
-            hearts = await self.user_manager.lose_heart(user_id)
-            await self.user_manager.db.execute(
-                """UPDATE quiz_sessions 
-                   SET current_question = ?
-                   WHERE user_id = ? AND lesson_id = ?
-                   AND id = (SELECT MAX(id) FROM quiz_sessions WHERE user_id = ? AND lesson_id = ?)""",
-                (question_idx + 1, user_id, lesson_id, user_id, lesson_id)
-            )
-            
-            correct_answer = escape_markdown(question['options'][question['correct']])
-            feedback = f"❌ *Incorrect!*\n\nCorrect answer: {correct_answer}\n\n❤️ Hearts remaining: {hearts}"
+            feedback = INCORRECT.render(answer=question['options'][question['correct']], hearts=hearts)
             
             if hearts == 0:
-                feedback += "\n\n⚠️ *No hearts left!* Come back later or wait for refill."
-        
-        keyboard = [[InlineKeyboardButton("Next →", callback_data=f"quiz_next_{language}_{unit}_{lesson_id}")]]
+                feedback += NO_HEARTS.render()
         
         await query.edit_message_text(
             feedback,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=single_button("Next →", f"quiz_next_{language}_{unit}_{lesson_id}"),
             parse_mode="MarkdownV2"
         )
         
@@ -195,16 +227,17 @@ class QuizHandler:
         is_correct = user_answer.lower() == correct_answer.lower()
         
         if is_correct:
-            await self.user_manager.add_xp(user_id, self.config.XP_PER_CORRECT_ANSWER)
+            await self.user_manager.add_xp(
+                user_id, self.config.XP_PER_CORRECT_ANSWER, language=answer_data['language']
+            )
             await update.message.reply_text(
-                f"✅ *Correct!*\n\n+{self.config.XP_PER_CORRECT_ANSWER} XP",
+                CORRECT.render(xp=self.config.XP_PER_CORRECT_ANSWER),
                 parse_mode="MarkdownV2"
             )
         else:
             hearts = await self.user_manager.lose_heart(user_id)
             await update.message.reply_text(
-                f"❌ *Incorrect!*\n\nCorrect answer: {escape_markdown(correct_answer)}\n\n"
-                f"❤️ Hearts remaining: {hearts}",
+                INCORRECT.render(answer=correct_answer, hearts=hearts),
                 parse_mode="MarkdownV2"
             )
         
@@ -227,38 +260,38 @@ class QuizHandler:
         total = session['total_questions']
         score = int((correct / total) * 100) if total > 0 else 0
         
-        # Complete lesson
-        await self.user_manager.complete_lesson(user_id, language, unit, lesson_id, score)
-        
-        # Check achievements
-        if score == 100:
-            unlocked = await self.user_manager.unlock_achievement(user_id, "perfect_quiz")
-            if unlocked:
-                achievement_text = "\n\n🎉 *Achievement Unlocked:* 💯 Perfect Score!"
-            else:
-                achievement_text = ""
-        else:
-            achievement_text = ""
-        
-        # Get updated user data
-        user = await self.user_manager.get_or_create_user(user_id)
+        # Complete lesson and let the achievement engine react in one transaction
+        async with self.user_manager.db.transaction() as tx:
+            user = await self.user_manager.complete_lesson(
+                user_id, language, unit, lesson_id, score, tx=tx
+            )
+            unlocked = user['achievements'] + await self.user_manager.publish(
+                "quiz_scored", user_id, tx=tx, lesson_id=lesson_id, score=score
+            )
         
-        text = (
-            f"🎊 *Quiz Complete!*\n\n"
-            f"Score: {correct}/{total} \\({score}%\\)\n"
-            f"XP Earned: \\+{self.config.XP_PER_LESSON_COMPLETE}\n"
-            f"Current XP: {user['xp']}\n"
-            f"Streak: {user['streak']} days 🔥"
-            f"{achievement_text}"
+        achievement_lines = []
+        for achievement_id in unlocked:
+            achievement = self.config.ACHIEVEMENTS[achievement_id]
+            achievement_lines.append(ACHIEVEMENT_UNLOCKED.render(name=achievement['name']))
+            user['xp'] += achievement['xp']
+        
+        text = QUIZ_COMPLETE.render(
+            correct=correct,
+            total=total,
+            score=score,
+            xp_earned=self.config.XP_PER_LESSON_COMPLETE,
+            xp=user['xp'],
+            streak=user['streak'],
+            achievements="".join(achievement_lines)
         )
         
-        keyboard = [
-            [InlineKeyboardButton("📚 More Lessons", callback_data=f"unit_{language}_{unit}")],
-            [InlineKeyboardButton("🏠 Main Menu", callback_data="menu_main")]
-        ]
+        keyboard = KEYBOARDS.dynamic(("lesson_complete", language, unit), lambda: [
+            [("📚 More Lessons", f"unit_{language}_{unit}")],
+            [("🏠 Main Menu", "menu_main")]
+        ])
         
         await query.edit_message_text(
             text,
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=keyboard,
             parse_mode="MarkdownV2"
         )
@@ -5,10 +5,18 @@ from .database_manager import DatabaseManager
 from .user_manager import UserManager
 from .lesson_manager import LessonManager
 from .notification_manager import NotificationManager
+from .rank_manager import RankManager
+from .achievement_manager import AchievementManager
+from .broadcast_manager import BroadcastManager
+from .outbox_manager import OutboxManager
 
 __all__ = [
     'DatabaseManager',
     'UserManager',
     'LessonManager',
-    'NotificationManager'
+    'NotificationManager',
+    'RankManager',
+    'AchievementManager',
+    'BroadcastManager',
+    'OutboxManager'
 ]
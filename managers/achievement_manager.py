@@ -0,0 +1,121 @@
+"""
+Achievement Manager - Unlocks achievements from game events
+"""
+import logging
+from typing import Dict, List, Tuple, Any
+from managers.database_manager import Transaction
+from managers.user_manager import UserManager
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Counters maintained per user in user_counters
+LESSONS_COMPLETED = "lessons_completed"
+BEST_STREAK = "best_streak"
+PERFECT_QUIZZES = "perfect_quizzes"
+
+
+class AchievementManager:
+    """
+    Evaluates declarative achievement rules against per-user counters
+    
+    Every game event moves one counter with a single upsert and checks only
+    the rules declared on that counter in ``Config.ACHIEVEMENTS``, so an
+    event never scans a user's progress history. New rules on an existing
+    counter need no schema change.
+    """
+    
+    def __init__(self, user_manager: UserManager):
+        self.user_manager = user_manager
+        self.config = Config()
+        self.rules = self._index_rules(self.config.ACHIEVEMENTS)
+        
+        user_manager.subscribe("lesson_completed", self.on_lesson_completed)
+        user_manager.subscribe("streak_updated", self.on_streak_updated)
+        user_manager.subscribe("quiz_scored", self.on_quiz_scored)
+    
+    @staticmethod
+    def _index_rules(achievements: Dict[str, Dict[str, Any]]) -> Dict[str, List[Tuple[int, str]]]:
+        """Group rules by counter as (requirement, achievement_id), lowest first"""
+        rules: Dict[str, List[Tuple[int, str]]] = {}
+        for achievement_id, achievement in achievements.items():
+            counter = achievement.get("counter")
+            if counter:
+                rules.setdefault(counter, []).append((achievement['requirement'], achievement_id))
+        for counter_rules in rules.values():
+            counter_rules.sort()
+        return rules
+    
+    async def on_lesson_completed(self, user_id: int, tx: Transaction,
+                                  first_completion: bool = False, **_) -> List[str]:
+        """Count a lesson the first time it is completed"""
+        if not first_completion:
+            return []
+        return await self._increment(user_id, LESSONS_COMPLETED, tx)
+    
+    async def on_streak_updated(self, user_id: int, tx: Transaction,
+                                streak: int = 0, **_) -> List[str]:
+        """Track the best streak a user has reached"""
+        if streak <= 0:
+            return []
+        row = await tx.execute_returning(
+            """INSERT INTO user_counters (user_id, counter, value) VALUES (?, ?, ?)
+               ON CONFLICT (user_id, counter) DO UPDATE SET value = excluded.value
+               WHERE excluded.value > user_counters.value
+               RETURNING value""",
+            (user_id, BEST_STREAK, streak)
+        )
+        if row is None:
+            return []  # Not a new best
+        return await self._check_rules(user_id, BEST_STREAK, row['value'], tx)
+    
+    async def on_quiz_scored(self, user_id: int, tx: Transaction,
+                             score: int = 0, **_) -> List[str]:
+        """Count perfect quiz scores"""
+        if score < 100:
+            return []
+        return await self._increment(user_id, PERFECT_QUIZZES, tx)
+    
+    async def _increment(self, user_id: int, counter: str, tx: Transaction,
+                         amount: int = 1) -> List[str]:
+        """Add to a counter and unlock the rules it now satisfies"""
+        row = await tx.execute_returning(
+            """INSERT INTO user_counters (user_id, counter, value) VALUES (?, ?, ?)
+               ON CONFLICT (user_id, counter) DO UPDATE SET value = value + excluded.value
+               RETURNING value""",
+            (user_id, counter, amount)
+        )
+        return await self._check_rules(user_id, counter, row['value'], tx)
+    
+    async def _check_rules(self, user_id: int, counter: str, value: int,
+                           tx: Transaction) -> List[str]:
+        """Unlock every not-yet-owned achievement on ``counter`` reached by ``value``"""
+        reached = [achievement_id for requirement, achievement_id in self.rules.get(counter, [])
+                   if requirement <= value]
+        if not reached:
+            return []
+        
+        placeholders = ",".join("?" * len(reached))
+        owned = await tx.fetch_all(
+            f"""SELECT achievement_id FROM achievements
+                WHERE user_id = ? AND achievement_id IN ({placeholders})""",
+            (user_id, *reached)
+        )
+        owned_ids = {row['achievement_id'] for row in owned}
+        
+        unlocked = []
+        for achievement_id in reached:
+            if achievement_id in owned_ids:
+                continue
+            if await self.user_manager.unlock_achievement(user_id, achievement_id, tx=tx):
+                unlocked.append(achievement_id)
+                logger.info(f"🏆 User {user_id} unlocked {achievement_id}")
+        return unlocked
+    
+    async def get_counters(self, user_id: int) -> Dict[str, int]:
+        """Get a user's achievement counters"""
+        rows = await self.user_manager.db.fetch_all(
+            "SELECT counter, value FROM user_counters WHERE user_id = ?",
+            (user_id,)
+        )
+        return {row['counter']: row['value'] for row in rows}
@@ -0,0 +1,198 @@
+"""
+Broadcast Manager - Rate-limited concurrent message delivery
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, Optional, Tuple, Union
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+from managers.user_manager import UserManager
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Delivery outcomes
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+# BadRequest messages that mean the chat is gone for good
+_GONE_CHAT_ERRORS = ("chat not found", "user is deactivated", "bot was blocked")
+
+Message = Tuple[Any, ...]
+
+
+def _retry_delay(error: RetryAfter) -> float:
+    """Seconds to wait from a RetryAfter (int or timedelta depending on PTB)"""
+    delay = error.retry_after
+    if isinstance(delay, timedelta):
+        return delay.total_seconds()
+    return float(delay)
+
+
+class BroadcastManager:
+    """
+    Sends many messages concurrently within Telegram's rate limits
+    
+    A fixed pool of workers pulls messages from a bounded queue, so memory
+    stays flat for any number of recipients. Every send takes a token from
+    a global bucket and respects a per-chat interval. RetryAfter pauses the
+    whole bucket, transient network errors back off exponentially, and
+    chats that blocked the bot or no longer exist get notifications
+    disabled.
+    """
+    
+    def __init__(self, user_manager: UserManager, rate_per_second: float = 25,
+                 per_chat_interval: float = 1.0, workers: int = 8,
+                 max_retries: int = 3, backoff_seconds: float = 1.0,
+                 progress_every: int = 1000):
+        self.user_manager = user_manager
+        self.bucket = TokenBucket(rate_per_second)
+        self.per_chat_interval = per_chat_interval
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.progress_every = progress_every
+        self._chat_ready: Dict[Any, float] = {}
+        self.last_stats: Optional[Dict[str, Any]] = None
+    
+    async def broadcast(self, bot, messages: Union[Iterable[Message], AsyncIterable[Message]],
+                        parse_mode: Optional[str] = "MarkdownV2",
+                        on_result: Optional[Callable[[Message, str], Awaitable[None]]] = None
+                        ) -> Dict[str, Any]:
+        """
+        Deliver messages and return delivery statistics
+        
+        Each message is a tuple starting with (chat_id, text); any further
+        items are passed back untouched to ``on_result(message, outcome)``.
+        """
+        stats = {
+            "total": 0,
+            SENT: 0,
+            BLOCKED: 0,
+            FAILED: 0,
+            "retries": 0,
+            "started_at": time.monotonic(),
+            "elapsed_seconds": 0.0,
+            "messages_per_second": 0.0
+        }
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        workers = [
+            asyncio.create_task(self._worker(bot, queue, parse_mode, on_result, stats))
+            for _ in range(self.workers)
+        ]
+        
+        try:
+            if hasattr(messages, "__aiter__"):
+                async for message in messages:
+                    await queue.put(message)
+            else:
+                for message in messages:
+                    await queue.put(message)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            self._chat_ready.clear()
+        
+        self._update_rate(stats)
+        del stats["started_at"]
+        self.last_stats = stats
+        if stats["total"]:
+            logger.info(
+                f"📬 Broadcast done: {stats[SENT]} sent, {stats[BLOCKED]} blocked, "
+                f"{stats[FAILED]} failed in {stats['elapsed_seconds']:.1f}s "
+                f"({stats['messages_per_second']:.1f} msg/s)"
+            )
+        return stats
+    
+    @staticmethod
+    def _update_rate(stats: Dict[str, Any]):
+        """Refresh elapsed time and throughput"""
+        elapsed = time.monotonic() - stats["started_at"]
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["messages_per_second"] = round(stats[SENT] / elapsed, 2) if elapsed > 0 else 0.0
+    
+    async def _worker(self, bot, queue: asyncio.Queue, parse_mode: Optional[str],
+                      on_result, stats: Dict[str, Any]):
+        """Send queued messages until the end-of-queue marker"""
+        while True:
+            message = await queue.get()
+            if message is None:
+                return
+            
+            outcome = await self._deliver(bot, message, parse_mode, stats)
+            stats["total"] += 1
+            stats[outcome] += 1
+            if on_result is not None:
+                try:
+                    await on_result(message, outcome)
+                except Exception as e:
+                    logger.error(f"❌ Broadcast result callback failed: {e}")
+            
+            if self.progress_every and stats["total"] % self.progress_every == 0:
+                self._update_rate(stats)
+                logger.info(
+                    f"📬 Broadcast progress: {stats['total']} processed, "
+                    f"{stats['messages_per_second']:.1f} msg/s"
+                )
+    
+    async def _wait_for_chat(self, chat_id):
+        """Keep at least ``per_chat_interval`` between sends to one chat"""
+        now = time.monotonic()
+        ready = self._chat_ready.get(chat_id, 0.0)
+        if ready > now:
+            await asyncio.sleep(ready - now)
+            now = ready
+        self._chat_ready[chat_id] = now + self.per_chat_interval
+        
+        if len(self._chat_ready) > 10000:
+            self._chat_ready = {
+                chat: at for chat, at in self._chat_ready.items() if at > now
+            }
+    
+    async def _deliver(self, bot, message: Message, parse_mode: Optional[str],
+                       stats: Dict[str, Any]) -> str:
+        """Send one message with retries; returns SENT, BLOCKED or FAILED"""
+        chat_id, text = message[0], message[1]
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                stats["retries"] += 1
+            await self._wait_for_chat(chat_id)
+            await self.bucket.acquire()
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+                return SENT
+            except RetryAfter as e:
+                # Flood control applies to the whole bot, so every sender waits
+                delay = _retry_delay(e)
+                logger.warning(f"⏳ Flood control: pausing broadcast for {delay:.0f}s")
+                self.bucket.pause(delay)
+            except Forbidden as e:
+                await self._disable(chat_id, e)
+                return BLOCKED
+            except BadRequest as e:
+                if any(reason in str(e).lower() for reason in _GONE_CHAT_ERRORS):
+                    await self._disable(chat_id, e)
+                    return BLOCKED
+                logger.error(f"❌ Failed to send to {chat_id}: {e}")
+                return FAILED
+            except NetworkError as e:
+                delay = self.backoff_seconds * 2 ** attempt
+                logger.warning(f"⚠️ Send to {chat_id} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"❌ Failed to send to {chat_id}: {e}")
+                return FAILED
+        
+        logger.error(f"❌ Giving up on {chat_id} after {self.max_retries} retries")
+        return FAILED
+    
+    async def _disable(self, chat_id, error: Exception):
+        """Stop notifying a chat that can no longer receive messages"""
+        logger.info(f"🔕 Disabling notifications for {chat_id}: {error}")
+        try:
+            await self.user_manager.set_notifications(chat_id, False)
+        except Exception as e:
+            logger.error(f"❌ Failed to disable notifications for {chat_id}: {e}")
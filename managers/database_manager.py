@@ -1,27 +1,285 @@
 """
 Database Manager - Handles all database operations
 """
+import asyncio
+import os
+import shutil
+import time
 import aiosqlite
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
+from pathlib import Path
 from typing import Optional, List, Dict, Any
+from managers.query_stats import QueryStats
 
 logger = logging.getLogger(__name__)
 
+# PRAGMA synchronous levels accepted for the writer connection
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# Ordered schema migrations: (version, description, statements). Each one is
+# applied once, in its own transaction, and recorded in PRAGMA user_version.
+# Append new migrations to the end; never edit one that has shipped.
+MIGRATIONS = [
+    (1, "Add indexes for leaderboard, reminder, progress and quiz session queries", [
+        "CREATE INDEX IF NOT EXISTS idx_users_xp ON users (xp DESC, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_inactive ON users (notification_enabled, last_active)",
+        """CREATE INDEX IF NOT EXISTS idx_progress_user_language
+           ON progress (user_id, language, completed, completed_at, unit, lesson_id, score)""",
+        """CREATE INDEX IF NOT EXISTS idx_progress_user_recent
+           ON progress (user_id, completed, completed_at)""",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_sessions_user_lesson ON quiz_sessions (user_id, lesson_id)",
+        "ANALYZE"
+    ]),
+    (2, "Add XP rollups for weekly and per-language leaderboards", [
+        """CREATE TABLE IF NOT EXISTS xp_rollups (
+               period TEXT NOT NULL,
+               language TEXT NOT NULL,
+               user_id INTEGER NOT NULL,
+               xp INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (period, language, user_id)
+           ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_xp_rollups_rank ON xp_rollups (period, language, xp DESC)"
+    ]),
+    (3, "Add per-user achievement counters", [
+        """CREATE TABLE IF NOT EXISTS user_counters (
+               user_id INTEGER NOT NULL,
+               counter TEXT NOT NULL,
+               value INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (user_id, counter)
+           ) WITHOUT ROWID""",
+        """INSERT OR IGNORE INTO user_counters (user_id, counter, value)
+           SELECT user_id, 'lessons_completed', COUNT(*) FROM progress
+           WHERE completed = 1 GROUP BY user_id""",
+        """INSERT OR IGNORE INTO user_counters (user_id, counter, value)
+           SELECT user_id, 'perfect_quizzes', COUNT(*) FROM progress
+           WHERE completed = 1 AND score = 100 GROUP BY user_id""",
+        """INSERT OR IGNORE INTO user_counters (user_id, counter, value)
+           SELECT user_id, 'best_streak', streak FROM users WHERE streak > 0"""
+    ]),
+    (4, "Add per-user progress summary for menus and stats", [
+        """CREATE TABLE IF NOT EXISTS progress_summary (
+               user_id INTEGER NOT NULL,
+               language TEXT NOT NULL,
+               unit TEXT NOT NULL,
+               lessons_completed INTEGER NOT NULL DEFAULT 0,
+               best_score INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (user_id, language, unit)
+           ) WITHOUT ROWID""",
+        """INSERT OR IGNORE INTO progress_summary (user_id, language, unit, lessons_completed, best_score)
+           SELECT user_id, language, unit, COUNT(*), MAX(score) FROM progress
+           WHERE completed = 1 GROUP BY user_id, language, unit"""
+    ]),
+    (5, "Add a per-user reminder schedule", [
+        "ALTER TABLE users ADD COLUMN next_reminder_at TEXT",
+        # Due one day after the last activity, at the user's slot within the hour
+        """UPDATE users SET next_reminder_at = strftime('%Y-%m-%dT%H:%M:%S',
+               COALESCE(last_active, created_at), '+24 hours', '+' || (user_id % 3600) || ' seconds')""",
+        """CREATE INDEX IF NOT EXISTS idx_users_reminder_due
+           ON users (notification_enabled, next_reminder_at)"""
+    ]),
+    (6, "Add the notification outbox", [
+        """CREATE TABLE IF NOT EXISTS notification_outbox (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               user_id INTEGER NOT NULL,
+               text TEXT NOT NULL,
+               dedup_key TEXT NOT NULL UNIQUE,
+               status TEXT NOT NULL DEFAULT 'pending',
+               attempts INTEGER NOT NULL DEFAULT 0,
+               next_attempt_at TEXT NOT NULL,
+               last_error TEXT,
+               created_at TEXT NOT NULL,
+               sent_at TEXT
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_outbox_due
+           ON notification_outbox (status, next_attempt_at)"""
+    ]),
+]
+
+
+async def _run_statement(conn: aiosqlite.Connection, method: str, query: str, params):
+    """Run one statement on a connection; ``method`` selects the result shape"""
+    if method == "executemany":
+        return await conn.executemany(query, params)
+    if method == "execute":
+        return await conn.execute(query, params)
+    
+    async with conn.execute(query, params) as cursor:
+        if method == "one":
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+        rows = await cursor.fetchall()
+        if method == "returning":
+            return dict(rows[0]) if rows else None
+        return [dict(row) for row in rows]
+
+
+class Transaction:
+    """A unit of work on the writer connection
+    
+    Statements run inside one ``BEGIN IMMEDIATE`` transaction and reads see
+    the transaction's own uncommitted writes. Callbacks registered with
+    ``on_commit`` run only after the transaction has committed.
+    """
+    
+    def __init__(self, manager: "DatabaseManager"):
+        self._manager = manager
+        self._on_commit = []
+    
+    async def execute(self, query: str, params: tuple = ()) -> aiosqlite.Cursor:
+        """Execute a statement inside the transaction"""
+        return await self._manager._run(self._manager.db, "execute", query, params)
+    
+    async def executemany(self, query: str, params_seq) -> aiosqlite.Cursor:
+        """Execute a statement for every parameter tuple"""
+        return await self._manager._run(self._manager.db, "executemany", query, list(params_seq))
+    
+    async def execute_returning(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        """Execute a write with a ``RETURNING`` clause and return its first row"""
+        return await self._manager._run(self._manager.db, "returning", query, params)
+    
+    async def fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        """Fetch a single row"""
+        return await self._manager._run(self._manager.db, "one", query, params)
+    
+    async def fetch_all(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """Fetch all rows"""
+        return await self._manager._run(self._manager.db, "all", query, params)
+    
+    def on_commit(self, callback):
+        """Run a callback once the transaction commits"""
+        self._on_commit.append(callback)
+
 
 class DatabaseManager:
-    """Manages database connections and operations"""
+    """Manages database connections and operations
     
-    def __init__(self, db_path: str):
+    The database runs in WAL mode with one writer connection (``self.db``)
+    and a pool of read-only connections, so reads never queue behind writes.
+    With ``group_commit`` enabled, writes are queued and committed together
+    in one transaction per short window instead of one commit per statement.
+    Passing a ``QueryStats`` enables per-query timing and the slow-query log.
+    
+    ``synchronous`` is the SQLite sync level. FULL (the default) syncs the
+    WAL on every commit, so a committed write survives power loss; NORMAL
+    skips that sync and can lose the last commits on an OS crash.
+    """
+    
+    def __init__(self, db_path: str, read_pool_size: int = 4, busy_timeout_ms: int = 5000,
+                 group_commit: bool = False, group_commit_window_ms: float = 5,
+                 group_commit_max_batch: int = 100, query_stats: Optional[QueryStats] = None,
+                 synchronous: str = "FULL"):
+        if synchronous.upper() not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_LEVELS)}")
         self.db_path = db_path
+        self.synchronous = synchronous.upper()
+        self.query_stats = query_stats
+        self.read_pool_size = read_pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.group_commit = group_commit
+        self.group_commit_window = group_commit_window_ms / 1000
+        self.group_commit_max_batch = max(1, group_commit_max_batch)
         self.db: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._reader_queue: Optional[asyncio.Queue] = None
+        self._pool_stats = {
+            "acquisitions": 0,
+            "waits": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0
+        }
+        self._write_lock = asyncio.Lock()
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._commit_stats = {
+            "batches": 0,
+            "statements": 0,
+            "max_batch_size": 0,
+            "total_commit_ms": 0.0,
+            "max_commit_ms": 0.0
+        }
+    
+    @property
+    def is_memory(self) -> bool:
+        """Whether the database lives in memory (no file to share)"""
+        return self.db_path in ("", ":memory:")
     
     async def initialize(self):
         """Initialize database and create tables"""
         self.db = await aiosqlite.connect(self.db_path)
         self.db.row_factory = aiosqlite.Row
+        await self.db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        if not self.is_memory:
+            await self.db.execute("PRAGMA journal_mode = WAL")
+            await self.db.execute(f"PRAGMA synchronous = {self.synchronous}")
         await self._create_tables()
-        logger.info(f"✅ Database initialized: {self.db_path}")
+        await self._run_migrations()
+        await self._open_readers()
+        
+        if self.group_commit:
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._group_commit_loop())
+        
+        logger.info(
+            f"✅ Database initialized: {self.db_path} "
+            f"(readers: {len(self._readers)})"
+        )
+    
+    async def _open_readers(self):
+        """Open the pool of read-only connections"""
+        if self.is_memory or self.read_pool_size <= 0:
+            # An in-memory database can't be shared; reads use the writer
+            return
+        
+        uri = Path(self.db_path).absolute().as_uri() + "?mode=ro"
+        if self._reader_queue is None:
+            self._reader_queue = asyncio.Queue()
+        for _ in range(self.read_pool_size):
+            reader = await aiosqlite.connect(uri, uri=True)
+            reader.row_factory = aiosqlite.Row
+            await reader.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            self._readers.append(reader)
+            self._reader_queue.put_nowait(reader)
+    
+    @asynccontextmanager
+    async def _reader(self):
+        """Borrow a read-only connection from the pool"""
+        if self._reader_queue is None:
+            yield self.db
+            return
+        
+        start = time.perf_counter()
+        try:
+            reader = self._reader_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            reader = await self._reader_queue.get()
+            waited_ms = (time.perf_counter() - start) * 1000
+            self._pool_stats["waits"] += 1
+            self._pool_stats["total_wait_ms"] += waited_ms
+            self._pool_stats["max_wait_ms"] = max(self._pool_stats["max_wait_ms"], waited_ms)
+        self._pool_stats["acquisitions"] += 1
+        
+        try:
+            yield reader
+        finally:
+            # A connection from a pool that was closed meanwhile is dropped
+            if reader in self._readers:
+                self._reader_queue.put_nowait(reader)
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get reader pool statistics for monitoring"""
+        available = self._reader_queue.qsize() if self._reader_queue else 0
+        stats = dict(self._pool_stats)
+        stats.update({
+            "size": len(self._readers),
+            "available": available,
+            "in_use": len(self._readers) - available,
+            "avg_wait_ms": (
+                stats["total_wait_ms"] / stats["waits"] if stats["waits"] else 0.0
+            )
+        })
+        return stats
     
     async def _create_tables(self):
         """Create all required tables"""
@@ -89,29 +347,276 @@ class DatabaseManager:
             
             await self.db.commit()
     
+    async def _get_schema_version(self) -> int:
+        """Read the schema version stored in PRAGMA user_version"""
+        async with self.db.execute("PRAGMA user_version") as cursor:
+            row = await cursor.fetchone()
+            return row[0]
+    
+    async def _run_migrations(self):
+        """Apply pending schema migrations in order"""
+        if await self._get_schema_version() >= MIGRATIONS[-1][0]:
+            return
+        
+        for version, description, statements in MIGRATIONS:
+            await self.db.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-check under the write lock in case another process migrated
+                if await self._get_schema_version() >= version:
+                    await self.db.rollback()
+                    continue
+                for statement in statements:
+                    await self.db.execute(statement)
+                await self.db.execute(f"PRAGMA user_version = {int(version)}")
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                logger.error(f"❌ Migration {version} failed: {description}")
+                raise
+            logger.info(f"✅ Applied migration {version}: {description}")
+    
     async def execute(self, query: str, params: tuple = ()) -> aiosqlite.Cursor:
-        """Execute a query with parameters"""
-        async with self.db.cursor() as cursor:
-            await cursor.execute(query, params)
+        """Execute a query with parameters
+        
+        In group-commit mode the statement is queued and this returns once
+        the batch containing it has been committed.
+        """
+        return await self._write("execute", query, params)
+    
+    async def executemany(self, query: str, params_seq) -> aiosqlite.Cursor:
+        """Execute a statement for every parameter tuple in one commit"""
+        return await self._write("executemany", query, list(params_seq))
+    
+    async def execute_returning(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        """Execute a write with a ``RETURNING`` clause and return its first row"""
+        return await self._write("returning", query, params)
+    
+    async def _write(self, method: str, query: str, params):
+        """Run a write on the writer connection (or queue it for group commit)"""
+        if self._write_queue is not None:
+            future = asyncio.get_running_loop().create_future()
+            self._write_queue.put_nowait((method, query, params, future))
+            return await future
+        
+        async with self._write_lock:
+            result = await self._run_write(method, query, params)
+            await self.db.commit()
+            return result
+    
+    async def _run_write(self, method: str, query: str, params):
+        """Run a single write statement without committing"""
+        return await self._run(self.db, method, query, params)
+    
+    async def _run(self, conn: aiosqlite.Connection, method: str, query: str, params):
+        """Run a statement, timing it when query stats are enabled"""
+        if self.query_stats is None:
+            return await _run_statement(conn, method, query, params)
+        
+        start = time.perf_counter()
+        result = await _run_statement(conn, method, query, params)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        if method in ("execute", "executemany"):
+            rows = result.rowcount
+        elif method == "all":
+            rows = len(result)
+        else:
+            rows = 1 if result else 0
+        
+        if self.query_stats.record(query, elapsed_ms, rows):
+            plan = None
+            if not self.query_stats.has_plan(query):
+                explain_params = params[0] if method == "executemany" and params else params
+                plan = await self._explain(conn, query, explain_params)
+            self.query_stats.log_slow_query(query, elapsed_ms, plan)
+        return result
+    
+    async def _explain(self, conn: aiosqlite.Connection, query: str, params) -> str:
+        """Get the EXPLAIN QUERY PLAN output for a statement"""
+        try:
+            rows = await _run_statement(conn, "all", f"EXPLAIN QUERY PLAN {query}", params)
+            return "\n".join(row['detail'] for row in rows)
+        except Exception as e:
+            return f"(no plan: {e})"
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Run several statements as one atomic unit of work
+        
+        Usage::
+        
+            async with db.transaction() as tx:
+                await tx.execute(...)
+        
+        The writer is held for the whole block, so only ``tx`` methods may
+        be used inside it (calling ``execute`` would wait forever).
+        """
+        async with self._write_lock:
+            tx = Transaction(self)
+            await self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield tx
+            except BaseException:
+                await self.db.rollback()
+                raise
+            await self.db.commit()
+            
+            # Still under the lock, so callbacks run in commit order
+            for callback in tx._on_commit:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"❌ Commit callback failed: {e}")
+    
+    async def flush(self):
+        """Wait until every queued write has been committed"""
+        if self._write_queue is not None:
+            future = asyncio.get_running_loop().create_future()
+            self._write_queue.put_nowait((None, None, (), future))
+            await future
+    
+    async def _group_commit_loop(self):
+        """Collect queued writes into batches and commit each batch once"""
+        while True:
+            item = await self._write_queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            stop = False
+            deadline = asyncio.get_running_loop().time() + self.group_commit_window
+            while len(batch) < self.group_commit_max_batch:
+                try:
+                    item = self._write_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._write_queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            async with self._write_lock:
+                await self._apply_batch(batch)
+            if stop:
+                return
+    
+    async def _apply_batch(self, batch: list):
+        """Run a batch of writes in one transaction and resolve their futures"""
+        results = []
+        for method, query, params, future in batch:
+            if method is None or future.done():
+                # Flush barrier, or the caller gave up waiting
+                results.append((future, None, None))
+                continue
+            try:
+                result = await self._run_write(method, query, params)
+                results.append((future, result, None))
+            except Exception as e:
+                # A failed statement only rolls back itself
+                results.append((future, None, e))
+        
+        start = time.perf_counter()
+        try:
             await self.db.commit()
-            return cursor
+        except Exception as e:
+            logger.error(f"❌ Group commit failed: {e}")
+            await self.db.rollback()
+            results = [(future, None, error or e) for future, _, error in results]
+        commit_ms = (time.perf_counter() - start) * 1000
+        
+        self._commit_stats["batches"] += 1
+        self._commit_stats["statements"] += len(batch)
+        self._commit_stats["max_batch_size"] = max(self._commit_stats["max_batch_size"], len(batch))
+        self._commit_stats["total_commit_ms"] += commit_ms
+        self._commit_stats["max_commit_ms"] = max(self._commit_stats["max_commit_ms"], commit_ms)
+        
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
+    def get_commit_stats(self) -> Dict[str, Any]:
+        """Get group-commit statistics for monitoring"""
+        stats = dict(self._commit_stats)
+        batches = stats["batches"]
+        stats.update({
+            "enabled": self._write_queue is not None,
+            "queue_depth": self._write_queue.qsize() if self._write_queue else 0,
+            "avg_batch_size": stats["statements"] / batches if batches else 0.0,
+            "avg_commit_ms": stats["total_commit_ms"] / batches if batches else 0.0
+        })
+        return stats
     
     async def fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
         """Fetch a single row"""
-        async with self.db.cursor() as cursor:
-            await cursor.execute(query, params)
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        async with self._reader() as conn:
+            return await self._run(conn, "one", query, params)
     
     async def fetch_all(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """Fetch all rows"""
-        async with self.db.cursor() as cursor:
-            await cursor.execute(query, params)
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        async with self._reader() as conn:
+            return await self._run(conn, "all", query, params)
+    
+    async def checkpoint(self):
+        """Fold the WAL back into the main database file (e.g. before a file copy)"""
+        if not self.is_memory:
+            await self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    async def restore(self, source_path: str):
+        """
+        Replace the database with a backup file and reopen it
+        
+        Queued writes are flushed, then the writer lock is held and every
+        reader taken back from the pool, so no statement runs while the file
+        is swapped. Reads that arrive meanwhile wait on the same queue for
+        the reopened pool. The old WAL is removed so none of its frames are
+        replayed over the restored file, and reopening runs the migrations,
+        bringing an older backup up to the current schema.
+        """
+        if self.is_memory:
+            raise ValueError("Cannot restore an in-memory database")
+        
+        await self._stop_group_commit()
+        async with self._write_lock:
+            for _ in self._readers:
+                await self._reader_queue.get()
+            for reader in self._readers:
+                await reader.close()
+            self._readers = []
+            await self.db.close()
+            
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
+            shutil.copy2(source_path, self.db_path)
+            await self.initialize()
+    
+    async def _stop_group_commit(self):
+        """Commit queued writes and stop the group-commit writer"""
+        if self._writer_task is not None:
+            self._write_queue.put_nowait(None)
+            await self._writer_task
+            self._writer_task = None
+            self._write_queue = None
     
     async def close(self):
-        """Close database connection"""
+        """Flush pending writes and close database connections"""
+        await self._stop_group_commit()
+        
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._reader_queue = None
+        
         if self.db:
             await self.db.close()
             logger.info("Database connection closed")
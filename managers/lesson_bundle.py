@@ -0,0 +1,132 @@
+"""
+Lesson Bundle - Compiled lesson catalog with lazy per-unit loading
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# File layout: MAGIC, header length (uint32 LE), header JSON, unit chunks
+MAGIC = b"LLBUNDL1"
+BUNDLE_SUFFIX = ".bundle"
+_HEADER_LENGTH = struct.Struct("<I")
+
+# Table of contents: language -> unit -> [[lesson_id, quiz_length], ...]
+Toc = Dict[str, Dict[str, List[List[Any]]]]
+
+
+def catalog_toc(lessons_data: Dict[str, Any]) -> Toc:
+    """Table of contents of a lesson catalog"""
+    return {
+        language: {
+            unit: [[lesson['id'], len(lesson.get('quiz', []))] for lesson in lessons]
+            for unit, lessons in units.items()
+        }
+        for language, units in lessons_data.items()
+    }
+
+
+def _intern_pairs(pairs):
+    """Decode hook sharing keys and short values across all loaded units"""
+    return {
+        sys.intern(key): sys.intern(value) if type(value) is str and len(value) <= 64 else value
+        for key, value in pairs
+    }
+
+
+def compile_bundle(lessons_data: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """
+    Write a validated catalog as a bundle and return its size metrics
+    
+    The file is written next to the target and renamed into place, so a
+    running bot that has the old bundle mapped keeps reading the old file.
+    """
+    chunks = []
+    units: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    offset = 0
+    for language, language_units in lessons_data.items():
+        for unit, lessons in language_units.items():
+            chunk = json.dumps(lessons, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            units.setdefault(language, {})[unit] = {
+                "offset": offset,
+                "length": len(chunk),
+                "lessons": [[lesson['id'], len(lesson.get('quiz', []))] for lesson in lessons]
+            }
+            chunks.append(chunk)
+            offset += len(chunk)
+    
+    body = b"".join(chunks)
+    header = json.dumps({
+        "digest": hashlib.sha256(body).hexdigest()[:16],
+        "units": units
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, path)
+    
+    return {
+        "bytes": len(MAGIC) + _HEADER_LENGTH.size + len(header) + len(body),
+        "header_bytes": len(header),
+        "units": len(chunks)
+    }
+
+
+class LessonBundle:
+    """
+    Read-only view of a compiled bundle
+    
+    Opening a bundle maps the file and parses only the header; each unit's
+    chunk is decoded on demand straight from the mapping.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        try:
+            if self._mmap[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a lesson bundle")
+            start = len(MAGIC) + _HEADER_LENGTH.size
+            (header_length,) = _HEADER_LENGTH.unpack_from(self._mmap, len(MAGIC))
+            header = json.loads(self._mmap[start:start + header_length])
+        except Exception:
+            self._mmap.close()
+            raise
+        
+        self.digest: str = header['digest']
+        self._units: Dict[str, Dict[str, Dict[str, Any]]] = header['units']
+        self._data_offset = start + header_length
+        self.size_bytes = len(self._mmap)
+    
+    @property
+    def toc(self) -> Toc:
+        """Table of contents, without loading any unit"""
+        return {
+            language: {unit: entry['lessons'] for unit, entry in units.items()}
+            for language, units in self._units.items()
+        }
+    
+    def load_unit(self, language: str, unit: str) -> List[Dict[str, Any]]:
+        """Decode one unit's lessons"""
+        entry = self._units[language][unit]
+        start = self._data_offset + entry['offset']
+        return json.loads(self._mmap[start:start + entry['length']], object_pairs_hook=_intern_pairs)
+    
+    def close(self):
+        """Release the mapping"""
+        self._mmap.close()
+
+
+def is_bundle(path: str) -> bool:
+    """Whether a lessons path points at a compiled bundle"""
+    return Path(path).suffix == BUNDLE_SUFFIX
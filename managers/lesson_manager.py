@@ -1,56 +1,364 @@
 """
 Lesson Manager - Handles lesson content and structure
 """
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, List, Any, Optional
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from managers.lesson_bundle import LessonBundle, Toc, catalog_toc, is_bundle
+from managers.lesson_schema import validate_lessons, validate_unit
 
 logger = logging.getLogger(__name__)
 
 
+def _read_shard(path: Path) -> Tuple[bytes, List[Dict[str, Any]]]:
+    """Read and validate one data/<language>/<unit>.json shard"""
+    raw = path.read_bytes()
+    lessons = json.loads(raw)
+    validate_unit(path.parent.name, path.stem, lessons)
+    return raw, lessons
+
+
+def read_shards(directory: str, max_workers: int = 8
+                ) -> Tuple[Dict[str, Any], Dict[Tuple[str, str], bytes], Dict[Tuple[str, str], str]]:
+    """
+    Parse a sharded lesson directory in parallel
+    
+    Returns the catalog of valid shards, their raw bytes, and an error
+    message for every shard that failed to parse or validate.
+    """
+    paths = sorted(Path(directory).glob("*/*.json"))
+    lessons_data: Dict[str, Any] = {}
+    raw_shards: Dict[Tuple[str, str], bytes] = {}
+    errors: Dict[Tuple[str, str], str] = {}
+    if not paths:
+        return lessons_data, raw_shards, errors
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+        futures = [(path, pool.submit(_read_shard, path)) for path in paths]
+        for path, future in futures:
+            key = (path.parent.name, path.stem)
+            try:
+                raw, lessons = future.result()
+            except Exception as e:
+                errors[key] = str(e)
+                continue
+            lessons_data.setdefault(key[0], {})[key[1]] = lessons
+            raw_shards[key] = raw
+    return lessons_data, raw_shards, errors
+
+
+class LessonSnapshot:
+    """
+    One version of the lesson catalog
+    
+    The table of contents (languages, units, lesson ids and quiz sizes) is
+    indexed up front; a unit's lessons are fetched through ``load_unit`` the
+    first time the unit is touched. Content never changes once published,
+    so readers holding a snapshot always see a consistent catalog.
+    """
+    
+    def __init__(self, version: int, digest: str, toc: Toc,
+                 load_unit: Callable[[str, str], List[Dict[str, Any]]],
+                 size_bytes: int = 0):
+        self.version = version
+        self.digest = digest
+        self.toc = toc
+        self.loaded_at = datetime.now()
+        self._load_unit = load_unit
+        self._units: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._unit_questions: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._lessons: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        
+        # Metrics
+        self.size_bytes = size_bytes
+        self.open_seconds = 0.0
+        self.unit_load_seconds = 0.0
+        
+        # Lesson locations and question ids, from the table of contents.
+        # Question ids follow catalog order, so they are stable for unchanged
+        # content; each unit owns the contiguous range starting at its base.
+        self.lesson_units: Dict[str, Tuple[str, str]] = {}
+        self.question_ids: Dict[Tuple[str, str, str], List[int]] = {}
+        self._unit_bases: List[int] = []
+        self._unit_keys: List[Tuple[str, str]] = []
+        question_count = 0
+        for language, units in toc.items():
+            for unit, lessons in units.items():
+                self._unit_bases.append(question_count)
+                self._unit_keys.append((language, unit))
+                for lesson_id, quiz_length in lessons:
+                    self.lesson_units.setdefault(lesson_id, (language, unit))
+                    self.question_ids[(language, unit, lesson_id)] = list(
+                        range(question_count, question_count + quiz_length)
+                    )
+                    question_count += quiz_length
+        self.question_count = question_count
+    
+    @classmethod
+    def from_data(cls, version: int, digest: str, lessons_data: Dict[str, Any],
+                  size_bytes: int = 0) -> "LessonSnapshot":
+        """Snapshot of an already parsed catalog"""
+        return cls(version, digest, catalog_toc(lessons_data),
+                   lambda language, unit: lessons_data[language][unit], size_bytes)
+    
+    @property
+    def lessons_data(self) -> Dict[str, Any]:
+        """The whole catalog (loads every unit)"""
+        return {
+            language: {unit: self.get_unit(language, unit) for unit in units}
+            for language, units in self.toc.items()
+        }
+    
+    def get_unit(self, language: str, unit: str) -> List[Dict[str, Any]]:
+        """Get a unit's lessons, loading the unit on first use"""
+        key = (language, unit)
+        lessons = self._units.get(key)
+        if lessons is None:
+            if unit not in self.toc.get(language, {}):
+                return []
+            started = time.perf_counter()
+            lessons = self._load_unit(language, unit)
+            for lesson in lessons:
+                self._lessons[(language, unit, lesson['id'])] = lesson
+            self._unit_questions[key] = [
+                question for lesson in lessons for question in lesson.get('quiz', [])
+            ]
+            self._units[key] = lessons
+            self.unit_load_seconds += time.perf_counter() - started
+        return lessons
+    
+    def get_lesson(self, language: str, unit: str, lesson_id: str) -> Optional[Dict[str, Any]]:
+        """Get a lesson by its full key"""
+        if (language, unit, lesson_id) not in self.question_ids:
+            return None
+        self.get_unit(language, unit)
+        return self._lessons.get((language, unit, lesson_id))
+    
+    def get_question(self, question_id: int) -> Optional[Dict[str, Any]]:
+        """Get a quiz question by id"""
+        if not 0 <= question_id < self.question_count:
+            return None
+        # Empty units share their base with the next unit, so take the last match
+        position = bisect_right(self._unit_bases, question_id) - 1
+        key = self._unit_keys[position]
+        self.get_unit(*key)
+        return self._unit_questions[key][question_id - self._unit_bases[position]]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Size and load-time metrics"""
+        return {
+            "version": self.version,
+            "digest": self.digest,
+            "size_bytes": self.size_bytes,
+            "units_total": len(self._unit_keys),
+            "units_loaded": len(self._units),
+            "open_ms": round(self.open_seconds * 1000, 2),
+            "unit_load_ms": round(self.unit_load_seconds * 1000, 2)
+        }
+
+
 class LessonManager:
-    """Manages lesson content and progression"""
+    """Manages lesson content and progression
+    
+    Content is served from an immutable ``LessonSnapshot``. ``reload_if_changed``
+    rebuilds the catalog in a worker thread when the lesson file changes,
+    validates it and swaps it in with a single reference assignment. Recent
+    snapshots are kept by content digest so quiz sessions finish on the
+    version they started with.
+    
+    ``lessons_path`` may be a JSON catalog, a directory sharded as
+    ``<language>/<unit>.json`` or a bundle compiled with ``build_lessons.py``.
+    Shards are parsed in parallel and validated one by one, so a bad shard
+    only takes out its own unit. A bundle's units are decoded when first used.
+    """
     
-    def __init__(self, lessons_path: str = "data/lessons.json"):
+    def __init__(self, lessons_path: str = "data/lessons.json", snapshots_retained: int = 5,
+                 load_workers: int = 8):
         self.lessons_path = lessons_path
-        self.lessons_data: Dict[str, Any] = {}
+        self.snapshots_retained = max(1, snapshots_retained)
+        self.load_workers = max(1, load_workers)
+        self._snapshot: Optional[LessonSnapshot] = None
+        self._snapshots: "OrderedDict[str, LessonSnapshot]" = OrderedDict()
+        self._file_state: Optional[Tuple] = None
+        self._reloading = False
         self.load_lessons()
     
+    @property
+    def snapshot(self) -> LessonSnapshot:
+        """The current catalog snapshot"""
+        return self._snapshot
+    
+    @property
+    def lessons_data(self) -> Dict[str, Any]:
+        """The current catalog (loads every unit)"""
+        return self._snapshot.lessons_data
+    
+    @property
+    def version(self) -> int:
+        """Version number of the current catalog"""
+        return self._snapshot.version
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Size and load-time metrics of the current catalog"""
+        return self._snapshot.get_stats()
+    
+    def get_snapshot(self, digest: str) -> Optional[LessonSnapshot]:
+        """Get a retained snapshot by content digest"""
+        return self._snapshots.get(digest)
+    
+    def _stat(self) -> Optional[Tuple]:
+        """Modification time and size of the lesson file or shards (None if missing)"""
+        path = Path(self.lessons_path)
+        try:
+            if not path.is_dir():
+                stat = path.stat()
+                return stat.st_mtime_ns, stat.st_size
+            state = []
+            for shard in sorted(path.glob("*/*.json")):
+                stat = shard.stat()
+                state.append((shard.name, shard.parent.name, stat.st_mtime_ns, stat.st_size))
+            return tuple(state)
+        except OSError:
+            return None
+    
+    def _build_sharded_snapshot(self, version: int) -> LessonSnapshot:
+        """Build a snapshot from valid shards, keeping the current copy of rejected units"""
+        lessons_data, raw_shards, errors = read_shards(self.lessons_path, self.load_workers)
+        previous = self._snapshot
+        kept = {}
+        for (language, unit), error in errors.items():
+            if previous is not None and unit in previous.toc.get(language, {}):
+                kept[(language, unit)] = previous.get_unit(language, unit)
+                logger.error(f"❌ Rejected lesson shard {language}/{unit}, keeping version {previous.version}: {error}")
+            else:
+                logger.error(f"❌ Rejected lesson shard {language}/{unit}: {error}")
+        
+        if not raw_shards and not kept:
+            raise ValueError(f"no valid lesson shards in {self.lessons_path}")
+        
+        digest = hashlib.sha256()
+        for key in sorted(set(raw_shards) | set(kept)):
+            language, unit = key
+            digest.update(f"{language}/{unit}\0".encode('utf-8'))
+            if key in raw_shards:
+                digest.update(raw_shards[key])
+            else:
+                lessons_data.setdefault(language, {})[unit] = kept[key]
+                digest.update(previous.digest.encode('utf-8'))
+        
+        # Shards were read in sorted order; re-sort so kept units slot in consistently
+        lessons_data = {
+            language: dict(sorted(units.items())) for language, units in sorted(lessons_data.items())
+        }
+        return LessonSnapshot.from_data(version, digest.hexdigest()[:16], lessons_data,
+                                        sum(len(raw) for raw in raw_shards.values()))
+    
+    def _build_snapshot(self, version: int) -> LessonSnapshot:
+        """Open and index the lesson source (bundles are validated when compiled)"""
+        started = time.perf_counter()
+        if Path(self.lessons_path).is_dir():
+            snapshot = self._build_sharded_snapshot(version)
+        elif is_bundle(self.lessons_path):
+            bundle = LessonBundle(self.lessons_path)
+            snapshot = LessonSnapshot(version, bundle.digest, bundle.toc, bundle.load_unit,
+                                      bundle.size_bytes)
+        else:
+            raw = Path(self.lessons_path).read_bytes()
+            lessons_data = json.loads(raw)
+            validate_lessons(lessons_data)
+            snapshot = LessonSnapshot.from_data(version, hashlib.sha256(raw).hexdigest()[:16],
+                                                lessons_data, len(raw))
+        snapshot.open_seconds = time.perf_counter() - started
+        return snapshot
+    
+    def _next_version(self) -> int:
+        """Version number for the next snapshot"""
+        return self._snapshot.version + 1 if self._snapshot else 1
+    
+    def _publish(self, snapshot: LessonSnapshot):
+        """Make a snapshot current and retain it for in-flight sessions"""
+        self._snapshots[snapshot.digest] = snapshot
+        self._snapshots.move_to_end(snapshot.digest)
+        while len(self._snapshots) > self.snapshots_retained:
+            self._snapshots.popitem(last=False)
+        self._snapshot = snapshot
+    
     def load_lessons(self):
-        """Load lessons from JSON file"""
+        """Load lessons from the JSON file, shard directory or bundle"""
+        state = self._stat()
         try:
-            lessons_file = Path(self.lessons_path)
-            if lessons_file.exists():
-                with open(lessons_file, 'r', encoding='utf-8') as f:
-                    self.lessons_data = json.load(f)
-                logger.info(f"✅ Loaded lessons from {self.lessons_path}")
+            if state is not None:
+                snapshot = self._build_snapshot(self._next_version())
+                logger.info(
+                    f"✅ Loaded lessons from {self.lessons_path} "
+                    f"({snapshot.size_bytes / 1024:.1f} KB in {snapshot.open_seconds * 1000:.1f} ms)"
+                )
             else:
                 logger.warning(f"⚠️ Lessons file not found: {self.lessons_path}")
-                self.lessons_data = self._get_default_lessons()
+                snapshot = LessonSnapshot.from_data(self._next_version(), "default", self._get_default_lessons())
         except Exception as e:
             logger.error(f"❌ Error loading lessons: {e}")
-            self.lessons_data = self._get_default_lessons()
+            if self._snapshot is not None:
+                return
+            snapshot = LessonSnapshot.from_data(self._next_version(), "default", self._get_default_lessons())
+        self._file_state = state
+        self._publish(snapshot)
+    
+    async def reload_if_changed(self, context=None) -> bool:
+        """Reload lessons in the background if the file changed (job callback)"""
+        state = self._stat()
+        if state is None or state == self._file_state or self._reloading:
+            return False
+        
+        self._reloading = True
+        try:
+            loop = asyncio.get_running_loop()
+            snapshot = await loop.run_in_executor(None, self._build_snapshot, self._next_version())
+        except Exception as e:
+            logger.error(f"❌ Lesson reload rejected, keeping version {self.version}: {e}")
+            return False
+        finally:
+            self._reloading = False
+            # Remember the file state either way so a broken file is not re-read every poll
+            self._file_state = state
+        
+        if snapshot.digest == self._snapshot.digest:
+            return False
+        self._publish(snapshot)
+        logger.info(f"🔄 Lessons reloaded: version {snapshot.version} ({snapshot.digest})")
+        return True
     
     def get_units(self, language: str) -> List[str]:
         """Get available units for a language"""
-        if language in self.lessons_data:
-            return list(self.lessons_data[language].keys())
-        return []
+        return list(self._snapshot.toc.get(language, {}))
+    
+    def count_lessons(self, language: str, unit: str) -> int:
+        """Number of lessons in a unit, from the table of contents (loads nothing)"""
+        return len(self._snapshot.toc.get(language, {}).get(unit, []))
     
     def get_lessons(self, language: str, unit: str) -> List[Dict[str, Any]]:
         """Get lessons for a specific unit"""
-        if language in self.lessons_data and unit in self.lessons_data[language]:
-            return self.lessons_data[language][unit]
-        return []
+        return self._snapshot.get_unit(language, unit)
     
     def get_lesson(self, language: str, unit: str, lesson_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific lesson"""
-        lessons = self.get_lessons(language, unit)
-        for lesson in lessons:
-            if lesson['id'] == lesson_id:
-                return lesson
-        return None
+        return self._snapshot.get_lesson(language, unit, lesson_id)
+    
+    def find_lesson(self, lesson_id: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """Get (language, unit, lesson) for a bare lesson id"""
+        snapshot = self._snapshot
+        location = snapshot.lesson_units.get(lesson_id)
+        if location is None:
+            return None
+        return (*location, snapshot.get_lesson(*location, lesson_id))
     
     def get_quiz_questions(self, language: str, unit: str, lesson_id: str) -> List[Dict[str, Any]]:
         """Get quiz questions for a lesson"""
@@ -59,6 +367,17 @@ class LessonManager:
             return lesson['quiz']
         return []
     
+    def get_question_ids(self, language: str, unit: str, lesson_id: str) -> List[int]:
+        """Get the ids of a lesson's quiz questions, in quiz order"""
+        return self._snapshot.question_ids.get((language, unit, lesson_id), [])
+    
+    def get_question(self, question_id: int, digest: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get a quiz question by id, from the current or a retained snapshot"""
+        snapshot = self._snapshot if digest is None else self._snapshots.get(digest)
+        if snapshot is None:
+            return None
+        return snapshot.get_question(question_id)
+    
     @staticmethod
     def _get_default_lessons() -> Dict[str, Any]:
         """Return default lesson structure"""
@@ -0,0 +1,65 @@
+"""
+Lesson Schema - Structural validation of lesson content
+"""
+from typing import Any, Dict
+
+# Field name -> required type; fields in the *_OPTIONAL maps may be absent
+LESSON_FIELDS = {"id": str, "title": str, "description": str, "vocabulary": list}
+LESSON_OPTIONAL = {"quiz": list}
+VOCABULARY_FIELDS = {"word": str, "translation": str}
+VOCABULARY_OPTIONAL = {"pronunciation": str, "furigana": str, "romanization": str}
+QUESTION_FIELDS = {
+    "multiple_choice": {"question": str, "options": list, "correct": int},
+    "text_input": {"question": str, "answer": str}
+}
+
+
+def _check_fields(item: Any, fields: Dict[str, type], optional: Dict[str, type], where: str):
+    """Raise ValueError unless item is an object with the given typed fields"""
+    if not isinstance(item, dict):
+        raise ValueError(f"{where}: expected an object")
+    for name, expected in fields.items():
+        if name not in item:
+            raise ValueError(f"{where}: missing {name}")
+    for name, expected in {**fields, **optional}.items():
+        if name in item and not isinstance(item[name], expected):
+            raise ValueError(f"{where}: {name} must be {expected.__name__}")
+
+
+def validate_unit(language: str, unit: str, lessons: Any):
+    """Raise ValueError if one unit's lesson list is malformed"""
+    if not isinstance(lessons, list):
+        raise ValueError(f"{language}/{unit}: lessons must be a list")
+    
+    seen = set()
+    for position, lesson in enumerate(lessons):
+        _check_fields(lesson, LESSON_FIELDS, LESSON_OPTIONAL, f"{language}/{unit} lesson {position + 1}")
+        lesson_id = lesson['id']
+        if lesson_id in seen:
+            raise ValueError(f"{language}/{unit}: duplicate lesson id {lesson_id}")
+        seen.add(lesson_id)
+        
+        for idx, item in enumerate(lesson['vocabulary']):
+            _check_fields(item, VOCABULARY_FIELDS, VOCABULARY_OPTIONAL,
+                          f"{language}/{unit}/{lesson_id} word {idx + 1}")
+        
+        for idx, question in enumerate(lesson.get('quiz', [])):
+            where = f"{language}/{unit}/{lesson_id} question {idx + 1}"
+            question_type = question.get('type') if isinstance(question, dict) else None
+            if question_type not in QUESTION_FIELDS:
+                raise ValueError(f"{where}: unknown type {question_type!r}")
+            _check_fields(question, QUESTION_FIELDS[question_type], {}, where)
+            if question_type == 'multiple_choice' and not 0 <= question['correct'] < len(question['options']):
+                raise ValueError(f"{where}: correct option out of range")
+
+
+def validate_lessons(lessons_data: Any):
+    """Raise ValueError if the lesson catalog is malformed"""
+    if not isinstance(lessons_data, dict) or not lessons_data:
+        raise ValueError("catalog must be a non-empty object of languages")
+    
+    for language, units in lessons_data.items():
+        if not isinstance(units, dict):
+            raise ValueError(f"{language}: units must be an object")
+        for unit, lessons in units.items():
+            validate_unit(language, unit, lessons)
@@ -3,61 +3,103 @@ Notification Manager - Handles user notifications
 """
 import logging
 from datetime import datetime
+from typing import Optional
 from telegram import Bot
 from telegram.ext import ContextTypes
 from managers.user_manager import UserManager
+from managers.database_manager import Transaction
+from managers.broadcast_manager import BroadcastManager
+from managers.outbox_manager import OutboxManager
 from config import Config
+from utils.formatter import MessageTemplate
 
 logger = logging.getLogger(__name__)
 
+STREAK_REMINDER_TEXT = MessageTemplate(
+    "🔥 *Don't break your streak!*\n\n"
+    "You haven't practiced today. "
+    "Keep your learning momentum going! 💪\n\n"
+    "Tap /learn to continue your journey."
+).render()
+
+ACHIEVEMENT_TEXT = MessageTemplate(
+    "🎉 *Achievement Unlocked!*\n\n"
+    "{name}\n"
+    "+{xp} XP\n\n"
+    "Keep up the great work!"
+)
+
 
 class NotificationManager:
-    """Manages notifications and reminders"""
+    """Manages notifications and reminders
+    
+    Messages are queued in the notification outbox and delivered by the
+    ``deliver_outbox`` job, never sent inline by their producers.
+    """
     
     def __init__(self, user_manager: UserManager):
         self.user_manager = user_manager
         self.config = Config()
+        self.broadcaster = BroadcastManager(
+            user_manager,
+            rate_per_second=self.config.BROADCAST_RATE_PER_SECOND,
+            per_chat_interval=self.config.BROADCAST_PER_CHAT_INTERVAL,
+            workers=self.config.BROADCAST_WORKERS,
+            max_retries=self.config.BROADCAST_MAX_RETRIES
+        )
+        self.outbox = OutboxManager(
+            user_manager.db,
+            self.broadcaster,
+            batch_size=self.config.OUTBOX_BATCH_SIZE,
+            max_attempts=self.config.OUTBOX_MAX_ATTEMPTS
+        )
     
     async def check_inactive_users(self, context: ContextTypes.DEFAULT_TYPE):
-        """Check for inactive users and send reminders"""
+        """Queue streak reminders for inactive users whose reminder slot has arrived"""
         try:
-            inactive_users = await self.user_manager.get_inactive_users(
-                self.config.STREAK_NOTIFICATION_HOURS
-            )
+            hours = self.config.STREAK_NOTIFICATION_HOURS
+            batch_size = self.config.REMINDER_BATCH_SIZE
+            today = datetime.now().date().isoformat()
+            queued = 0
             
-            for user_id in inactive_users:
-                try:
-                    await context.bot.send_message(
-                        chat_id=user_id,
-                        text="🔥 *Don't break your streak\\!*\n\n"
-                             "You haven't practiced today\\. "
-                             "Keep your learning momentum going\\! 💪\n\n"
-                             "Tap /learn to continue your journey\\.",
-                        parse_mode="MarkdownV2"
+            await self.user_manager.reschedule_active_reminders(hours)
+            while True:
+                # Claiming and queueing commit together, so a crash can neither
+                # lose a claimed reminder nor queue it twice
+                async with self.user_manager.db.transaction() as tx:
+                    user_ids = await self.user_manager.claim_due_reminders(hours, batch_size, tx=tx)
+                    queued += await self.outbox.enqueue_many(
+                        [(user_id, STREAK_REMINDER_TEXT, f"streak:{user_id}:{today}")
+                         for user_id in user_ids],
+                        tx=tx
                     )
-                    logger.info(f"✅ Sent reminder to user {user_id}")
-                except Exception as e:
-                    logger.error(f"❌ Failed to send reminder to {user_id}: {e}")
+                if len(user_ids) < batch_size:
+                    break
             
-            if inactive_users:
-                logger.info(f"📬 Sent {len(inactive_users)} streak reminders")
+            if queued:
+                logger.info(f"📬 Queued {queued} streak reminders")
         
         except Exception as e:
             logger.error(f"❌ Error in check_inactive_users: {e}")
     
-    async def send_achievement_notification(self, context: ContextTypes.DEFAULT_TYPE, 
-                                           user_id: int, achievement_id: str):
-        """Send achievement unlock notification"""
+    async def deliver_outbox(self, context: ContextTypes.DEFAULT_TYPE):
+        """Deliver queued notifications"""
+        try:
+            await self.outbox.drain(context.bot)
+        except Exception as e:
+            logger.error(f"❌ Error delivering outbox: {e}")
+    
+    async def send_achievement_notification(self, user_id: int, achievement_id: str,
+                                            tx: Optional[Transaction] = None):
+        """Queue achievement unlock notification"""
         try:
             achievement = self.config.ACHIEVEMENTS.get(achievement_id)
             if achievement:
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=f"🎉 *Achievement Unlocked\\!*\n\n"
-                         f"{achievement['name']}\n"
-                         f"\\+{achievement['xp']} XP\n\n"
-                         f"Keep up the great work\\!",
-                    parse_mode="MarkdownV2"
+                await self.outbox.enqueue(
+                    user_id,
+                    ACHIEVEMENT_TEXT.render(name=achievement['name'], xp=achievement['xp']),
+                    f"achievement:{user_id}:{achievement_id}",
+                    tx=tx
                 )
         except Exception as e:
-            logger.error(f"❌ Failed to send achievement notification: {e}")
+            logger.error(f"❌ Failed to queue achievement notification: {e}")
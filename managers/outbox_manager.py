@@ -0,0 +1,144 @@
+"""
+Outbox Manager - Persisted notification queue with batched delivery
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from managers.database_manager import DatabaseManager, Transaction
+from managers.broadcast_manager import BroadcastManager, SENT, BLOCKED, FAILED
+
+logger = logging.getLogger(__name__)
+
+# Outbox row states
+PENDING = "pending"
+DELIVERED = "sent"
+DEAD = "failed"
+
+# A claimed row is retried after this long if the drainer never recorded a result
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+class OutboxManager:
+    """
+    Messages are enqueued in the bot's database and delivered by a drainer
+    
+    Producers write to ``notification_outbox`` (inside their own
+    transaction when they have one), so a crash never loses a queued
+    message. Dedup keys make enqueueing idempotent. The drainer claims due
+    rows in batches, sends them through the broadcast engine and records
+    sent time or retry state for each row as soon as its send completes.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, broadcaster: BroadcastManager,
+                 batch_size: int = 200, max_attempts: int = 5,
+                 retry_base_seconds: int = 60):
+        self.db = db_manager
+        self.broadcaster = broadcaster
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+    
+    async def enqueue(self, user_id: int, text: str, dedup_key: str,
+                      tx: Optional[Transaction] = None) -> bool:
+        """Queue a MarkdownV2 message; returns False if the dedup key was already used"""
+        return await self.enqueue_many([(user_id, text, dedup_key)], tx=tx) == 1
+    
+    async def enqueue_many(self, messages: Iterable[Tuple[int, str, str]],
+                           tx: Optional[Transaction] = None) -> int:
+        """Queue (user_id, text, dedup_key) messages; returns how many were new"""
+        now = datetime.now().isoformat()
+        rows = [(user_id, text, dedup_key, now, now) for user_id, text, dedup_key in messages]
+        if not rows:
+            return 0
+        
+        query = """INSERT OR IGNORE INTO notification_outbox
+                   (user_id, text, dedup_key, next_attempt_at, created_at)
+                   VALUES (?, ?, ?, ?, ?)"""
+        if tx is None:
+            cursor = await self.db.executemany(query, rows)
+        else:
+            cursor = await tx.executemany(query, rows)
+        return cursor.rowcount
+    
+    async def _claim(self) -> List[Dict[str, Any]]:
+        """Lease the next batch of due messages"""
+        now = datetime.now()
+        async with self.db.transaction() as tx:
+            return await tx.fetch_all(
+                """UPDATE notification_outbox
+                   SET attempts = attempts + 1, next_attempt_at = ?
+                   WHERE id IN (
+                       SELECT id FROM notification_outbox
+                       WHERE status = ? AND next_attempt_at <= ?
+                       ORDER BY next_attempt_at
+                       LIMIT ?
+                   )
+                   RETURNING id, user_id, text, attempts""",
+                ((now + CLAIM_LEASE).isoformat(), PENDING, now.isoformat(), self.batch_size)
+            )
+    
+    def _result_row(self, message_id: int, attempts: int, outcome: str,
+                    now: datetime) -> Tuple:
+        """Parameters for recording one delivery result"""
+        if outcome == SENT:
+            return (DELIVERED, now.isoformat(), None, None, message_id)
+        if outcome == BLOCKED or attempts >= self.max_attempts:
+            return (DEAD, None, None, outcome, message_id)
+        
+        retry_at = now + timedelta(seconds=self.retry_base_seconds * 2 ** (attempts - 1))
+        return (PENDING, None, retry_at.isoformat(), outcome, message_id)
+    
+    async def drain(self, bot, max_batches: int = 10) -> Dict[str, int]:
+        """Deliver due messages in batches; returns counts per outcome"""
+        totals = {SENT: 0, BLOCKED: 0, FAILED: 0}
+        for _ in range(max_batches):
+            batch = await self._claim()
+            if not batch:
+                break
+            
+            # Each result is saved as soon as its send completes (group commit
+            # batches these writes), so a crash mid-batch only leaves the
+            # messages that were still in flight to be resent after the lease
+            async def record(message, outcome):
+                await self.db.execute(
+                    """UPDATE notification_outbox
+                       SET status = ?, sent_at = ?,
+                           next_attempt_at = COALESCE(?, next_attempt_at), last_error = ?
+                       WHERE id = ?""",
+                    self._result_row(message[2], message[3], outcome, datetime.now())
+                )
+                totals[outcome] += 1
+            
+            await self.broadcaster.broadcast(
+                bot,
+                [(row['user_id'], row['text'], row['id'], row['attempts']) for row in batch],
+                on_result=record
+            )
+            
+            if len(batch) < self.batch_size:
+                break
+        
+        if any(totals.values()):
+            logger.info(
+                f"📤 Outbox delivered {totals[SENT]}, blocked {totals[BLOCKED]}, "
+                f"failed {totals[FAILED]}"
+            )
+        return totals
+    
+    async def cleanup(self, retention_hours: int) -> int:
+        """Delete delivered and dead messages older than the retention window"""
+        cutoff = (datetime.now() - timedelta(hours=retention_hours)).isoformat()
+        cursor = await self.db.execute(
+            "DELETE FROM notification_outbox WHERE status != ? AND created_at < ?",
+            (PENDING, cutoff)
+        )
+        if cursor.rowcount:
+            logger.info(f"🧹 Removed {cursor.rowcount} finished outbox messages")
+        return cursor.rowcount
+    
+    async def get_stats(self) -> Dict[str, int]:
+        """Get message counts per status"""
+        rows = await self.db.fetch_all(
+            "SELECT status, COUNT(*) AS count FROM notification_outbox GROUP BY status"
+        )
+        return {row['status']: row['count'] for row in rows}
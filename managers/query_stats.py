@@ -0,0 +1,110 @@
+"""
+Query Stats - Per-query latency statistics and slow-query log
+"""
+import re
+import logging
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and replace literals so similar queries group together"""
+    query = _STRING_LITERAL.sub("?", query)
+    query = _NUMBER_LITERAL.sub("?", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+def _percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class QueryStats:
+    """Collects call counts, latency percentiles and row counts per normalized query"""
+    
+    def __init__(self, slow_query_ms: float = 100, sample_size: int = 1024,
+                 slow_log_size: int = 100):
+        self.slow_query_ms = slow_query_ms
+        self.sample_size = sample_size
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._plans: Dict[str, str] = {}
+    
+    def record(self, query: str, elapsed_ms: float, rows: int = 0) -> bool:
+        """Record one execution; returns True if it was a slow query"""
+        key = normalize_query(query)
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = self._stats[key] = {
+                "calls": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "rows": 0,
+                "samples": deque(maxlen=self.sample_size)
+            }
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["rows"] += max(0, rows)
+        entry["samples"].append(elapsed_ms)
+        if elapsed_ms > entry["max_ms"]:
+            entry["max_ms"] = elapsed_ms
+        return elapsed_ms >= self.slow_query_ms
+    
+    def has_plan(self, query: str) -> bool:
+        """Whether a query plan has already been captured for this query"""
+        return normalize_query(query) in self._plans
+    
+    def log_slow_query(self, query: str, elapsed_ms: float, plan: Optional[str] = None):
+        """Add a statement to the slow-query log"""
+        key = normalize_query(query)
+        if plan is not None:
+            self._plans[key] = plan
+        plan = self._plans.get(key, "")
+        self.slow_queries.append({
+            "query": key,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "plan": plan,
+            "at": datetime.now().isoformat()
+        })
+        logger.warning(f"🐢 Slow query ({elapsed_ms:.1f} ms): {key}\n{plan}")
+    
+    def get_stats(self, sort_by: str = "total_ms", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get per-query statistics, most expensive first"""
+        result = []
+        for query, entry in self._stats.items():
+            samples = sorted(entry["samples"])
+            result.append({
+                "query": query,
+                "calls": entry["calls"],
+                "total_ms": round(entry["total_ms"], 2),
+                "avg_ms": round(entry["total_ms"] / entry["calls"], 3),
+                "p50_ms": round(_percentile(samples, 50), 3),
+                "p95_ms": round(_percentile(samples, 95), 3),
+                "p99_ms": round(_percentile(samples, 99), 3),
+                "max_ms": round(entry["max_ms"], 3),
+                "rows": entry["rows"]
+            })
+        result.sort(key=lambda item: item[sort_by], reverse=True)
+        return result[:limit] if limit else result
+    
+    def get_slow_queries(self) -> List[Dict[str, Any]]:
+        """Get the most recent slow queries, newest last"""
+        return list(self.slow_queries)
+    
+    def reset(self):
+        """Clear all collected statistics"""
+        self._stats.clear()
+        self._plans.clear()
+        self.slow_queries.clear()
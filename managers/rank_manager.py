@@ -0,0 +1,90 @@
+"""
+Rank Manager - Leaderboard ranks in logarithmic time
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+from managers.database_manager import DatabaseManager
+
+try:
+    from sortedcontainers import SortedList
+except ImportError:  # Optional: fall back to indexed SQL queries
+    SortedList = None
+
+logger = logging.getLogger(__name__)
+
+
+class RankManager:
+    """
+    Keeps every user in an order-statistic structure keyed by (-xp, user_id)
+    
+    Seeded once at startup and updated incrementally as XP changes, so
+    "top K" and "rank of user" never scan the users table. Without
+    sortedcontainers (or before ``load``) it answers from the xp index.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, in_memory: bool = True):
+        self.db = db_manager
+        self.in_memory = in_memory and SortedList is not None
+        self._ranking = SortedList() if self.in_memory else None
+        self._xp: Dict[int, int] = {}
+        self.loaded = False
+    
+    async def load(self):
+        """Seed the in-memory ranking from the users table"""
+        if not self.in_memory:
+            logger.info("ℹ️ Rank service using SQL fallback")
+            return
+        
+        rows = await self.db.fetch_all("SELECT user_id, xp FROM users")
+        self._xp = {row['user_id']: row['xp'] or 0 for row in rows}
+        self._ranking = SortedList((-xp, user_id) for user_id, xp in self._xp.items())
+        self.loaded = True
+        logger.info(f"✅ Rank service loaded {len(self._xp)} users")
+    
+    def update(self, user_id: int, xp: int):
+        """Set a user's XP (adds the user if new)"""
+        if not self.loaded:
+            return
+        
+        old_xp = self._xp.get(user_id)
+        if old_xp == xp:
+            return
+        if old_xp is not None:
+            self._ranking.remove((-old_xp, user_id))
+        self._xp[user_id] = xp
+        self._ranking.add((-xp, user_id))
+    
+    def adjust(self, user_id: int, delta: int):
+        """Add an XP delta to a known user"""
+        if self.loaded and user_id in self._xp:
+            self.update(user_id, self._xp[user_id] + delta)
+    
+    async def get_rank(self, user_id: int) -> Optional[int]:
+        """Get a user's 1-based rank (ties broken by user_id)"""
+        if self.loaded:
+            xp = self._xp.get(user_id)
+            if xp is None:
+                return None
+            return self._ranking.index((-xp, user_id)) + 1
+        
+        row = await self.db.fetch_one(
+            """SELECT (SELECT COUNT(*) FROM users WHERE xp > u.xp)
+                    + (SELECT COUNT(*) FROM users WHERE xp = u.xp AND user_id < u.user_id) AS ahead
+               FROM users u WHERE u.user_id = ?""",
+            (user_id,)
+        )
+        return row['ahead'] + 1 if row else None
+    
+    async def get_top(self, limit: int = 10) -> List[Tuple[int, int]]:
+        """Get the top users as (user_id, xp) pairs"""
+        if self.loaded:
+            return [(user_id, -neg_xp) for neg_xp, user_id in self._ranking.islice(0, limit)]
+        
+        rows = await self.db.fetch_all(
+            "SELECT user_id, xp FROM users ORDER BY xp DESC, user_id LIMIT ?",
+            (limit,)
+        )
+        return [(row['user_id'], row['xp']) for row in rows]
+    
+    def __len__(self) -> int:
+        return len(self._xp)
@@ -2,147 +2,502 @@
 User Manager - Handles user-related operations
 """
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
-from managers.database_manager import DatabaseManager
+from datetime import datetime, timedelta, time
+from typing import Optional, Dict, Any, List, Iterable, Tuple, Callable, Awaitable
+from managers.database_manager import DatabaseManager, Transaction
+from managers.rank_manager import RankManager
 from config import Config
+from utils.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
 
+# Streak rule shared by update_streak and complete_lesson: unchanged on the
+# same day, +1 on the next day, reset to 1 after a gap. Params: today, yesterday.
+STREAK_CASE_SQL = """CASE substr(last_active, 1, 10)
+                        WHEN ? THEN streak
+                        WHEN ? THEN streak + 1
+                        ELSE 1
+                     END"""
+
+# Hearts as of :now, derived from the stored hearts and last_heart_refill:
+# a new day restores the daily maximum, otherwise one heart per
+# HEART_REFILL_HOURS is regenerated. Mirrors UserManager._effective_hearts.
+_HOURS_SINCE_REFILL_SQL = "(julianday(:now) - julianday(last_heart_refill)) * 24"
+EFFECTIVE_HEARTS_SQL = f"""CASE
+        WHEN substr(last_heart_refill, 1, 10) < :today THEN :max_hearts
+        WHEN hearts < :max_hearts AND {_HOURS_SINCE_REFILL_SQL} >= :refill_hours
+            THEN MIN(:max_hearts, hearts + CAST({_HOURS_SINCE_REFILL_SQL} / :refill_hours AS INTEGER))
+        ELSE hearts
+    END"""
+HEART_REFILL_ANCHOR_SQL = f"""CASE
+        WHEN substr(last_heart_refill, 1, 10) < :today THEN :midnight
+        WHEN hearts < :max_hearts AND {_HOURS_SINCE_REFILL_SQL} >= :refill_hours THEN :now
+        ELSE last_heart_refill
+    END"""
+
+
+# XP rollups: one row per (period, language, user). Period is "all" or an
+# ISO week ("2026-W42"); language is a language code or "all". The
+# ("all", "all") total is users.xp itself and is not duplicated here.
+ALL = "all"
+ROLLUP_UPSERT_SQL = """INSERT INTO xp_rollups (period, language, user_id, xp)
+                       VALUES (?, ?, ?, ?)
+                       ON CONFLICT (period, language, user_id)
+                       DO UPDATE SET xp = xp + excluded.xp"""
+
+# Per (user, language, unit) aggregate of completed lessons, kept by complete_lesson
+PROGRESS_SUMMARY_UPSERT_SQL = """INSERT INTO progress_summary
+                                     (user_id, language, unit, lessons_completed, best_score)
+                                 VALUES (?, ?, ?, ?, ?)
+                                 ON CONFLICT (user_id, language, unit) DO UPDATE SET
+                                     lessons_completed = lessons_completed + excluded.lessons_completed,
+                                     best_score = MAX(best_score, excluded.best_score)"""
+
+
+# Reminders are spread over the hour: each user has a fixed slot (in seconds)
+# within it, so a job running every few minutes sends a steady trickle.
+REMINDER_SPREAD_SECONDS = 3600
+REMINDER_SLOT_SQL = f"'+' || (user_id % {REMINDER_SPREAD_SECONDS}) || ' seconds'"
+NEXT_REMINDER_SQL = f"strftime('%Y-%m-%dT%H:%M:%S', last_active, ?, {REMINDER_SLOT_SQL})"
+# Claimed users move to their own slot ``hours`` after the hour they were due
+# in, so a slot late in the hour doesn't drift by the job's lag every day.
+# Rows overdue by more than ``hours`` (downtime) start from the current hour
+# instead, which spreads the backlog out again rather than firing it together.
+CLAIMED_REMINDER_SQL = f"""strftime('%Y-%m-%dT%H:%M:%S',
+                                    CASE WHEN next_reminder_at >= ?
+                                         THEN strftime('%Y-%m-%dT%H:00:00', next_reminder_at)
+                                         ELSE ? END,
+                                    ?, {REMINDER_SLOT_SQL})"""
+
+
+def next_reminder_at(user_id: int, hours: int, after: Optional[datetime] = None) -> str:
+    """When a user becomes due for a reminder ``hours`` after ``after``"""
+    due = (after or datetime.now()) + timedelta(hours=hours, seconds=user_id % REMINDER_SPREAD_SECONDS)
+    return due.isoformat(timespec="seconds")
+
+
+def week_period(when: Optional[datetime] = None) -> str:
+    """Rollup period key for the ISO week containing ``when``"""
+    year, week, _ = (when or datetime.now()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
 class UserManager:
     """Manages user data and game mechanics"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager,
+                 rank_manager: Optional[RankManager] = None):
         self.db = db_manager
+        self.rank_manager = rank_manager or RankManager(db_manager, in_memory=False)
         self.config = Config()
+        # Write-through cache of users rows; every UPDATE in this class keeps it current
+        self.user_cache = LRUCache(
+            max_size=self.config.USER_CACHE_SIZE,
+            ttl_seconds=self.config.USER_CACHE_TTL_SECONDS
+        )
+        # Cache fills reading now: user_id -> [write generation, readers]
+        self._fills: Dict[int, List[int]] = {}
+        # Game event listeners: event name -> async callables
+        self._listeners: Dict[str, List[Callable[..., Awaitable[Optional[List[str]]]]]] = {}
+    
+    def subscribe(self, event: str, listener: Callable[..., Awaitable[Optional[List[str]]]]):
+        """Register ``listener(user_id, tx, **data)`` for a game event"""
+        self._listeners.setdefault(event, []).append(listener)
+    
+    async def publish(self, event: str, user_id: int,
+                      tx: Optional[Transaction] = None, **data) -> List[str]:
+        """
+        Dispatch a game event inside the given transaction
+        
+        Events: lesson_completed, streak_updated, quiz_scored. Returns the
+        achievement ids unlocked by the listeners.
+        """
+        listeners = self._listeners.get(event)
+        if not listeners:
+            return []
+        if tx is None:
+            async with self.db.transaction() as tx:
+                return await self.publish(event, user_id, tx=tx, **data)
+        
+        unlocked = []
+        for listener in listeners:
+            unlocked.extend(await listener(user_id, tx, **data) or [])
+        return unlocked
+    
+    @staticmethod
+    def _after_commit(tx: Optional[Transaction], callback):
+        """Run a callback now, or once the surrounding transaction commits"""
+        if tx is None:
+            callback()
+        else:
+            tx.on_commit(callback)
+    
+    def _mark_written(self, user_id: int):
+        """Stop a cache fill reading this user now from storing a stale row"""
+        fill = self._fills.get(user_id)
+        if fill is not None:
+            fill[0] += 1
+    
+    def _cache_patch(self, user_id: int, fields: Dict[str, Any],
+                     tx: Optional[Transaction] = None):
+        """Apply a committed write to the cached user row"""
+        def apply():
+            self.user_cache.patch(user_id, fields)
+            self._mark_written(user_id)
+        self._after_commit(tx, apply)
+    
+    def _track_xp(self, user_id: int, fields: Dict[str, Any],
+                  tx: Optional[Transaction] = None):
+        """Apply a committed XP change to the user cache and the rank service"""
+        def apply():
+            self.user_cache.patch(user_id, fields)
+            self._mark_written(user_id)
+            self.rank_manager.update(user_id, fields['xp'])
+        self._after_commit(tx, apply)
+    
+    async def reset_caches(self):
+        """Drop cached user state after the database was replaced"""
+        self.user_cache.clear()
+        for fill in self._fills.values():
+            fill[0] += 1
+        if self.rank_manager.in_memory:
+            await self.rank_manager.load()
+    
+    def _effective_hearts(self, hearts: int, last_heart_refill: str,
+                          now: datetime) -> Tuple[int, Optional[str]]:
+        """
+        Compute hearts lazily instead of persisting every refill
+        
+        Returns the current hearts and the refill time to store if the
+        hearts are spent now (None if the stored one stays valid).
+        """
+        last_refill = datetime.fromisoformat(last_heart_refill)
+        if last_refill.date() < now.date():
+            # Daily reset: full hearts, as if refilled at midnight
+            return self.config.MAX_HEARTS, datetime.combine(now.date(), time.min).isoformat()
+        
+        if hearts < self.config.MAX_HEARTS:
+            hours_passed = (now - last_refill).total_seconds() / 3600
+            if hours_passed >= self.config.HEART_REFILL_HOURS:
+                refilled = hearts + int(hours_passed / self.config.HEART_REFILL_HOURS)
+                return min(self.config.MAX_HEARTS, refilled), now.isoformat()
+        
+        return hearts, None
+    
+    def _present_user(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a users row for callers, with hearts regenerated to now"""
+        user = dict(row)
+        if user.get('last_heart_refill'):
+            user['hearts'], _ = self._effective_hearts(
+                user['hearts'], user['last_heart_refill'], datetime.now()
+            )
+        return user
+    
+    def _heart_params(self, now: datetime) -> Dict[str, Any]:
+        """Named parameters for EFFECTIVE_HEARTS_SQL / HEART_REFILL_ANCHOR_SQL"""
+        return {
+            "now": now.isoformat(),
+            "today": now.date().isoformat(),
+            "midnight": datetime.combine(now.date(), time.min).isoformat(),
+            "max_hearts": self.config.MAX_HEARTS,
+            "refill_hours": self.config.HEART_REFILL_HOURS
+        }
     
     async def get_or_create_user(self, user_id: int, username: str = None, 
                                  first_name: str = None) -> Dict[str, Any]:
         """Get existing user or create new one"""
-        user = await self.db.fetch_one(
-            "SELECT * FROM users WHERE user_id = ?",
-            (user_id,)
-        )
+        return self._present_user(await self._load_user_row(user_id, username, first_name))
+    
+    async def _load_user_row(self, user_id: int, username: str = None,
+                             first_name: str = None) -> Dict[str, Any]:
+        """Get the stored users row (cached), creating it if needed"""
+        user = self.user_cache.get(user_id)
+        if user is not None:
+            return user
         
-        if not user:
-            await self.db.execute(
-                """INSERT INTO users (user_id, username, first_name, last_active, last_heart_refill)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (user_id, username, first_name, datetime.now().isoformat(), 
-                 datetime.now().isoformat())
-            )
-            user = await self.db.fetch_one(
-                "SELECT * FROM users WHERE user_id = ?",
-                (user_id,)
-            )
-            logger.info(f"✅ New user created: {user_id}")
+        # A write committing while we read leaves nothing cached to patch,
+        # so the row is only cached if no write happened in the meantime
+        fill = self._fills.setdefault(user_id, [0, 0])
+        generation = fill[0]
+        fill[1] += 1
+        try:
+            user = await self._read_user_row(user_id, username, first_name)
+        finally:
+            fill[1] -= 1
+            if not fill[1]:
+                del self._fills[user_id]
         
+        if fill[0] == generation:
+            self.user_cache.set(user_id, user)
         return user
     
-    async def update_hearts(self, user_id: int) -> Dict[str, Any]:
-        """Check and refill hearts if enough time has passed"""
+    async def _read_user_row(self, user_id: int, username: str = None,
+                             first_name: str = None) -> Dict[str, Any]:
+        """Read the users row from the database, creating it if needed"""
         user = await self.db.fetch_one(
-            "SELECT hearts, last_heart_refill FROM users WHERE user_id = ?",
+            "SELECT * FROM users WHERE user_id = ?",
             (user_id,)
         )
         
-        if user['hearts'] < self.config.MAX_HEARTS:
-            last_refill = datetime.fromisoformat(user['last_heart_refill'])
+        if not user:
             now = datetime.now()
-            hours_passed = (now - last_refill).total_seconds() / 3600
-            
-            if hours_passed >= self.config.HEART_REFILL_HOURS:
-                new_hearts = min(self.config.MAX_HEARTS, 
-                               user['hearts'] + int(hours_passed / self.config.HEART_REFILL_HOURS))
-                await self.db.execute(
-                    "UPDATE users SET hearts = ?, last_heart_refill = ? WHERE user_id = ?",
-                    (new_hearts, now.isoformat(), user_id)
+            user = await self.db.execute_returning(
+                """INSERT INTO users
+                   (user_id, username, first_name, last_active, last_heart_refill, next_reminder_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (user_id) DO NOTHING
+                   RETURNING *""",
+                (user_id, username, first_name, now.isoformat(), now.isoformat(),
+                 next_reminder_at(user_id, self.config.STREAK_NOTIFICATION_HOURS, now))
+            )
+            if user:
+                self.rank_manager.update(user_id, user['xp'])
+                logger.info(f"✅ New user created: {user_id}")
+            else:
+                # Created concurrently by another request
+                user = await self.db.fetch_one(
+                    "SELECT * FROM users WHERE user_id = ?",
+                    (user_id,)
                 )
-                return {"hearts": new_hearts, "refilled": True}
-        
-        return {"hearts": user['hearts'], "refilled": False}
+        return user
     
-    async def lose_heart(self, user_id: int) -> int:
-        """Decrease heart count"""
-        user = await self.db.fetch_one(
-            "SELECT hearts FROM users WHERE user_id = ?",
-            (user_id,)
+    async def set_current_language(self, user_id: int, language: str):
+        """Remember the language the user is studying"""
+        await self.db.execute(
+            "UPDATE users SET current_language = ? WHERE user_id = ?",
+            (language, user_id)
         )
-        new_hearts = max(0, user['hearts'] - 1)
+        self._cache_patch(user_id, {"current_language": language})
+    
+    async def set_notifications(self, user_id: int, enabled: bool):
+        """Enable or disable reminder notifications for a user"""
         await self.db.execute(
-            "UPDATE users SET hearts = ? WHERE user_id = ?",
-            (new_hearts, user_id)
+            "UPDATE users SET notification_enabled = ? WHERE user_id = ?",
+            (1 if enabled else 0, user_id)
         )
-        return new_hearts
+        self._cache_patch(user_id, {"notification_enabled": 1 if enabled else 0})
     
-    async def add_xp(self, user_id: int, xp: int) -> int:
-        """Add XP to user"""
-        user = await self.db.fetch_one(
-            "SELECT xp FROM users WHERE user_id = ?",
-            (user_id,)
+    async def update_hearts(self, user_id: int) -> Dict[str, Any]:
+        """Get current hearts, including any refill since the last spend
+        
+        Hearts regenerate lazily: nothing is written here, the regenerated
+        value is only persisted when a heart is spent (see lose_heart).
+        """
+        user = await self._load_user_row(user_id)
+        hearts, _ = self._effective_hearts(
+            user['hearts'], user['last_heart_refill'], datetime.now()
         )
-        new_xp = user['xp'] + xp
-        await self.db.execute(
-            "UPDATE users SET xp = ? WHERE user_id = ?",
-            (new_xp, user_id)
+        return {"hearts": hearts, "refilled": hearts > user['hearts']}
+    
+    async def lose_heart(self, user_id: int, tx: Optional[Transaction] = None) -> int:
+        """Spend a heart, persisting any regeneration up to now"""
+        conn = tx or self.db
+        user = await conn.execute_returning(
+            f"""UPDATE users
+                SET hearts = MAX(0, {EFFECTIVE_HEARTS_SQL} - 1),
+                    last_heart_refill = {HEART_REFILL_ANCHOR_SQL}
+                WHERE user_id = :user_id
+                RETURNING hearts, last_heart_refill""",
+            {**self._heart_params(datetime.now()), "user_id": user_id}
+        )
+        self._cache_patch(user_id, user, tx)
+        return user['hearts']
+    
+    def _rollup_rows(self, user_id: int, xp: int, language: Optional[str] = None) -> List[tuple]:
+        """Rollup rows touched by one XP award"""
+        week = week_period()
+        rows = [(week, ALL, user_id, xp)]
+        if language:
+            rows += [(week, language, user_id, xp), (ALL, language, user_id, xp)]
+        return rows
+    
+    async def add_xp(self, user_id: int, xp: int, tx: Optional[Transaction] = None,
+                     language: Optional[str] = None) -> int:
+        """Add XP to user (and to the weekly / per-language rollups)"""
+        if tx is None:
+            async with self.db.transaction() as tx:
+                return await self.add_xp(user_id, xp, tx=tx, language=language)
+        
+        user = await tx.execute_returning(
+            "UPDATE users SET xp = xp + ? WHERE user_id = ? RETURNING xp",
+            (xp, user_id)
         )
+        await tx.executemany(ROLLUP_UPSERT_SQL, self._rollup_rows(user_id, xp, language))
+        new_xp = user['xp']
+        self._track_xp(user_id, {"xp": new_xp}, tx)
         logger.info(f"➕ User {user_id} gained {xp} XP (Total: {new_xp})")
         return new_xp
     
-    async def update_streak(self, user_id: int) -> int:
-        """Update user's daily streak"""
-        user = await self.db.fetch_one(
-            "SELECT streak, last_active FROM users WHERE user_id = ?",
-            (user_id,)
+    async def add_xp_bulk(self, deltas: Iterable[Tuple[int, int]],
+                          tx: Optional[Transaction] = None):
+        """Apply many (user_id, xp) awards in one executemany (jobs, replays)"""
+        params = [(xp, user_id) for user_id, xp in deltas]
+        if not params:
+            return
+        if tx is None:
+            async with self.db.transaction() as tx:
+                return await self.add_xp_bulk([(user_id, xp) for xp, user_id in params], tx=tx)
+        
+        await tx.executemany(
+            "UPDATE users SET xp = xp + ? WHERE user_id = ?",
+            params
+        )
+        week = week_period()
+        await tx.executemany(
+            ROLLUP_UPSERT_SQL,
+            [(week, ALL, user_id, xp) for xp, user_id in params]
         )
+        def apply():
+            for xp, user_id in params:
+                self.user_cache.invalidate(user_id)
+                self._mark_written(user_id)
+                self.rank_manager.adjust(user_id, xp)
+        self._after_commit(tx, apply)
+        logger.info(f"➕ Applied {len(params)} bulk XP awards")
+    
+    async def update_streak(self, user_id: int, tx: Optional[Transaction] = None) -> int:
+        """Update user's daily streak"""
+        if tx is None:
+            async with self.db.transaction() as tx:
+                return await self.update_streak(user_id, tx=tx)
         
-        last_active = datetime.fromisoformat(user['last_active'])
         now = datetime.now()
-        days_diff = (now.date() - last_active.date()).days
-        
-        if days_diff == 0:
-            # Same day, no change
-            new_streak = user['streak']
-        elif days_diff == 1:
-            # Consecutive day, increment
-            new_streak = user['streak'] + 1
-        else:
-            # Streak broken
-            new_streak = 1
+        user = await tx.execute_returning(
+            f"""UPDATE users
+                SET streak = {STREAK_CASE_SQL},
+                    last_active = ?
+                WHERE user_id = ?
+                RETURNING streak""",
+            (now.date().isoformat(), (now.date() - timedelta(days=1)).isoformat(),
+             now.isoformat(), user_id)
+        )
+        self._cache_patch(user_id, {"streak": user['streak'], "last_active": now.isoformat()}, tx)
+        await self.publish("streak_updated", user_id, tx=tx, streak=user['streak'])
+        return user['streak']
+    
+    async def get_leaderboard(self, limit: int = 10, period: str = ALL,
+                              language: str = ALL) -> List[Dict[str, Any]]:
+        """Get top users by XP, all-time or for a rollup period/language"""
+        if period != ALL or language != ALL:
+            return await self.db.fetch_all(
+                """SELECT r.user_id, u.username, u.first_name, r.xp, u.streak
+                   FROM xp_rollups r JOIN users u ON u.user_id = r.user_id
+                   WHERE r.period = ? AND r.language = ?
+                   ORDER BY r.xp DESC
+                   LIMIT ?""",
+                (period, language, limit)
+            )
         
-        await self.db.execute(
-            "UPDATE users SET streak = ?, last_active = ? WHERE user_id = ?",
-            (new_streak, now.isoformat(), user_id)
+        top = await self.rank_manager.get_top(limit)
+        if not top:
+            return []
+        
+        user_ids = [user_id for user_id, _ in top]
+        placeholders = ", ".join("?" * len(user_ids))
+        rows = await self.db.fetch_all(
+            f"""SELECT user_id, username, first_name, xp, streak
+                FROM users
+                WHERE user_id IN ({placeholders})""",
+            tuple(user_ids)
         )
+        by_id = {row['user_id']: row for row in rows}
+        return [by_id[user_id] for user_id in user_ids if user_id in by_id]
+    
+    async def get_user_rank(self, user_id: int, period: str = ALL,
+                            language: str = ALL) -> Optional[Dict[str, int]]:
+        """Get a user's 1-based leaderboard position and XP for a board"""
+        if period == ALL and language == ALL:
+            rank = await self.rank_manager.get_rank(user_id)
+            if rank is None:
+                return None
+            user = await self.get_or_create_user(user_id)
+            return {"rank": rank, "xp": user['xp']}
         
-        return new_streak
+        return await self.db.fetch_one(
+            """SELECT 1 + (SELECT COUNT(*) FROM xp_rollups
+                           WHERE period = r.period AND language = r.language AND xp > r.xp) AS rank,
+                      r.xp
+               FROM xp_rollups r
+               WHERE r.period = ? AND r.language = ? AND r.user_id = ?""",
+            (period, language, user_id)
+        )
     
-    async def get_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get top users by XP"""
-        return await self.db.fetch_all(
-            """SELECT user_id, username, first_name, xp, streak
-               FROM users
-               ORDER BY xp DESC
-               LIMIT ?""",
-            (limit,)
+    async def compact_rollups(self, weeks_retained: int) -> int:
+        """Delete weekly rollups older than the retention window"""
+        cutoff = week_period(datetime.now() - timedelta(weeks=weeks_retained))
+        cursor = await self.db.execute(
+            "DELETE FROM xp_rollups WHERE period != ? AND period < ?",
+            (ALL, cutoff)
         )
+        if cursor.rowcount:
+            logger.info(f"🧹 Compacted {cursor.rowcount} XP rollup rows before {cutoff}")
+        return cursor.rowcount
     
     async def complete_lesson(self, user_id: int, language: str, 
-                             unit: str, lesson_id: str, score: int):
-        """Mark lesson as completed"""
-        await self.db.execute(
+                             unit: str, lesson_id: str, score: int,
+                             tx: Optional[Transaction] = None) -> Dict[str, Any]:
+        """
+        Mark lesson as completed, award XP and update streak atomically
+        
+        Returns the user's xp and streak after the lesson reward, plus the
+        ids of any achievements the lesson and streak events unlocked.
+        """
+        if tx is None:
+            async with self.db.transaction() as tx:
+                return await self.complete_lesson(user_id, language, unit, lesson_id, score, tx=tx)
+        
+        now = datetime.now()
+        previous = await tx.fetch_one(
+            """SELECT completed FROM progress
+               WHERE user_id = ? AND language = ? AND unit = ? AND lesson_id = ?""",
+            (user_id, language, unit, lesson_id)
+        )
+        await tx.execute(
             """INSERT OR REPLACE INTO progress 
                (user_id, language, unit, lesson_id, completed, score, completed_at)
                VALUES (?, ?, ?, ?, 1, ?, ?)""",
-            (user_id, language, unit, lesson_id, score, datetime.now().isoformat())
+            (user_id, language, unit, lesson_id, score, now.isoformat())
+        )
+        first_completion = not (previous and previous['completed'])
+        await tx.execute(
+            PROGRESS_SUMMARY_UPSERT_SQL,
+            (user_id, language, unit, 1 if first_completion else 0, score)
         )
         
-        # Award XP
-        await self.add_xp(user_id, self.config.XP_PER_LESSON_COMPLETE)
+        # Award XP and update streak (same rules as update_streak) in one statement
+        user = await tx.execute_returning(
+            f"""UPDATE users
+                SET xp = xp + ?,
+                    streak = {STREAK_CASE_SQL},
+                    last_active = ?
+                WHERE user_id = ?
+                RETURNING xp, streak""",
+            (self.config.XP_PER_LESSON_COMPLETE, now.date().isoformat(),
+             (now.date() - timedelta(days=1)).isoformat(), now.isoformat(), user_id)
+        )
+        await tx.executemany(
+            ROLLUP_UPSERT_SQL,
+            self._rollup_rows(user_id, self.config.XP_PER_LESSON_COMPLETE, language)
+        )
+        self._track_xp(
+            user_id,
+            {"xp": user['xp'], "streak": user['streak'], "last_active": now.isoformat()},
+            tx
+        )
+        logger.info(
+            f"➕ User {user_id} gained {self.config.XP_PER_LESSON_COMPLETE} XP "
+            f"(Total: {user['xp']})"
+        )
         
-        # Update streak
-        await self.update_streak(user_id)
+        user['achievements'] = await self.publish(
+            "lesson_completed", user_id, tx=tx, language=language, unit=unit,
+            lesson_id=lesson_id, score=score, first_completion=first_completion
+        )
+        user['achievements'] += await self.publish(
+            "streak_updated", user_id, tx=tx, streak=user['streak']
+        )
+        return user
     
     async def get_user_progress(self, user_id: int, language: str) -> Dict[str, Any]:
         """Get user's progress for a language"""
@@ -159,22 +514,62 @@ class UserManager:
             "lessons": completed
         }
     
-    async def unlock_achievement(self, user_id: int, achievement_id: str) -> bool:
-        """Unlock an achievement for user"""
-        try:
-            await self.db.execute(
-                "INSERT INTO achievements (user_id, achievement_id) VALUES (?, ?)",
-                (user_id, achievement_id)
+    async def get_lessons_status(self, user_id: int, language: str, unit: str,
+                                 lesson_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get completion status and score for many lessons in one query, keyed by lesson id"""
+        status: Dict[str, Dict[str, Any]] = {}
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(lesson_ids), 500):
+            chunk = lesson_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = await self.db.fetch_all(
+                f"""SELECT lesson_id, completed, score FROM progress
+                    WHERE user_id = ? AND language = ? AND unit = ?
+                    AND lesson_id IN ({placeholders})""",
+                (user_id, language, unit, *chunk)
             )
-            
-            # Award achievement XP
-            if achievement_id in self.config.ACHIEVEMENTS:
-                xp = self.config.ACHIEVEMENTS[achievement_id]['xp']
-                await self.add_xp(user_id, xp)
-            
-            return True
-        except:
+            for row in rows:
+                status[row['lesson_id']] = {"completed": bool(row['completed']), "score": row['score']}
+        return status
+    
+    async def get_progress_summary(self, user_id: int) -> Dict[str, Dict[str, Any]]:
+        """Get completed-lesson counts and best scores per language and unit"""
+        rows = await self.db.fetch_all(
+            """SELECT language, unit, lessons_completed, best_score
+               FROM progress_summary WHERE user_id = ?""",
+            (user_id,)
+        )
+        
+        summary: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            language = summary.setdefault(row['language'], {"total_lessons": 0, "units": {}})
+            language['total_lessons'] += row['lessons_completed']
+            language['units'][row['unit']] = {
+                "lessons_completed": row['lessons_completed'],
+                "best_score": row['best_score']
+            }
+        return summary
+    
+    async def unlock_achievement(self, user_id: int, achievement_id: str,
+                                 tx: Optional[Transaction] = None) -> bool:
+        """Unlock an achievement for user"""
+        if tx is None:
+            async with self.db.transaction() as tx:
+                return await self.unlock_achievement(user_id, achievement_id, tx=tx)
+        
+        cursor = await tx.execute(
+            "INSERT OR IGNORE INTO achievements (user_id, achievement_id) VALUES (?, ?)",
+            (user_id, achievement_id)
+        )
+        if cursor.rowcount == 0:
             return False  # Already unlocked
+        
+        # Award achievement XP
+        if achievement_id in self.config.ACHIEVEMENTS:
+            xp = self.config.ACHIEVEMENTS[achievement_id]['xp']
+            await self.add_xp(user_id, xp, tx=tx)
+        
+        return True
     
     async def get_achievements(self, user_id: int) -> List[str]:
         """Get user's unlocked achievements"""
@@ -184,19 +579,43 @@ class UserManager:
         )
         return [a['achievement_id'] for a in achievements]
     
-    async def get_inactive_users(self, hours: int) -> List[int]:
-        """Get users inactive for specified hours"""
-        threshold = (datetime.now() - timedelta(hours=hours)).isoformat()
-        users = await self.db.fetch_all(
-            """SELECT user_id FROM users 
-               WHERE last_active < ? AND notification_enabled = 1""",
-            (threshold,)
-        )
-        return [u['user_id'] for u in users]
+    async def reschedule_active_reminders(self, hours: int) -> int:
+        """Move due reminders of users active within ``hours`` to ``hours`` after their last activity"""
+        now = datetime.now()
+        async with self.db.transaction() as tx:
+            moved = await tx.fetch_all(
+                f"""UPDATE users SET next_reminder_at = {NEXT_REMINDER_SQL}
+                    WHERE notification_enabled = 1 AND next_reminder_at <= ?
+                    AND last_active >= ?
+                    RETURNING user_id, next_reminder_at""",
+                (f"+{int(hours)} hours", now.isoformat(),
+                 (now - timedelta(hours=hours)).isoformat())
+            )
+            for row in moved:
+                self._cache_patch(row['user_id'], {"next_reminder_at": row['next_reminder_at']}, tx)
+        return len(moved)
     
-    async def reset_hearts_for_all(self):
-        """Reset hearts to max for all users (daily maintenance)"""
-        await self.db.execute(
-            f"UPDATE users SET hearts = {self.config.MAX_HEARTS}, last_heart_refill = ?",
-            (datetime.now().isoformat(),)
+    async def claim_due_reminders(self, hours: int, limit: int,
+                                  tx: Optional[Transaction] = None) -> List[int]:
+        """Reschedule up to ``limit`` due users to their slot ``hours`` ahead and return their ids"""
+        if tx is None:
+            async with self.db.transaction() as tx:
+                return await self.claim_due_reminders(hours, limit, tx=tx)
+        
+        now = datetime.now()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        claimed = await tx.fetch_all(
+            f"""UPDATE users SET next_reminder_at = {CLAIMED_REMINDER_SQL}
+                WHERE user_id IN (
+                    SELECT user_id FROM users
+                    WHERE notification_enabled = 1 AND next_reminder_at <= ?
+                    ORDER BY next_reminder_at
+                    LIMIT ?
+                )
+                RETURNING user_id, next_reminder_at""",
+            ((now - timedelta(hours=hours)).isoformat(), hour.isoformat(),
+             f"+{int(hours)} hours", now.isoformat(), limit)
         )
+        for row in claimed:
+            self._cache_patch(row['user_id'], {"next_reminder_at": row['next_reminder_at']}, tx)
+        return [row['user_id'] for row in claimed]
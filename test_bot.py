@@ -5,6 +5,7 @@ Run this to verify all components are working
 import asyncio
 import sys
 import os
+from datetime import datetime
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -72,7 +73,78 @@ class BotTester:
             result = await db.fetch_one("SELECT 1 as test")
             self.test("Database queries work", result['test'] == 1)
             
+            # Test migrations and indexes
+            from managers.database_manager import MIGRATIONS
+            version = await db.fetch_one("PRAGMA user_version")
+            self.test("Migrations applied", version['user_version'] == MIGRATIONS[-1][0])
+            plan = await db.fetch_all("EXPLAIN QUERY PLAN SELECT user_id FROM users ORDER BY xp DESC LIMIT 10")
+            self.test("Leaderboard uses index", any('idx_users_xp' in p['detail'] for p in plan))
+            async with db.db.execute("PRAGMA synchronous") as cursor:
+                self.test("Durable commits by default", (await cursor.fetchone())[0] == 2)
+            
+            # Test reader pool sees committed writes
+            await db.execute("CREATE TABLE IF NOT EXISTS pool_test (value INTEGER)")
+            await db.execute("INSERT INTO pool_test (value) VALUES (?)", (7,))
+            row = await db.fetch_one("SELECT value FROM pool_test")
+            self.test("Reader pool sees writes", row is not None and row['value'] == 7)
+            stats = db.get_pool_stats()
+            self.test("Reader pool stats", stats['size'] == db.read_pool_size and stats['in_use'] == 0)
+            
+            await db.close()
+            
+            # Test query stats and slow-query log
+            from managers.query_stats import QueryStats
+            db = DatabaseManager("test_bot.db", query_stats=QueryStats(slow_query_ms=0))
+            await db.initialize()
+            await db.fetch_all("SELECT value FROM pool_test WHERE value > 1")
+            await db.fetch_all("SELECT value FROM pool_test WHERE value > 2")
+            stats = db.query_stats.get_stats()
+            self.test("Query stats normalize", stats[0]['calls'] == 2 and stats[0]['rows'] == 2)
+            slow = db.query_stats.get_slow_queries()
+            self.test("Slow query log has plan", bool(slow) and 'pool_test' in slow[0]['plan'])
+            await db.close()
+            
+            # Test group commit batches concurrent writes
+            db = DatabaseManager("test_bot.db", group_commit=True)
+            await db.initialize()
+            await asyncio.gather(*[
+                db.execute("INSERT INTO pool_test (value) VALUES (?)", (i,))
+                for i in range(20)
+            ])
+            row = await db.fetch_one("SELECT COUNT(*) as count FROM pool_test")
+            self.test("Group commit applies writes", row['count'] == 21)
+            stats = db.get_commit_stats()
+            self.test("Group commit batches writes", 0 < stats['batches'] < 20)
+            await db.close()
+            
+            # Test restore replaces live data still held in the WAL
+            import shutil
+            db = DatabaseManager("test_bot.db")
+            await db.initialize()
+            await db.checkpoint()
+            shutil.copy2("test_bot.db", "test_restore.db")
+            await db.execute("INSERT INTO pool_test (value) VALUES (?)", (99,))
+            await db.restore("test_restore.db")
+            row = await db.fetch_one("SELECT COUNT(*) as count FROM pool_test")
+            self.test("Restore replaces database", row['count'] == 21)
+            await db.close()
+            
+            # Test restore waits for a read in flight and keeps the pool whole
+            db = DatabaseManager("test_bot.db", read_pool_size=1)
+            await db.initialize()
+            slow_read = asyncio.create_task(db.fetch_one(
+                """WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 300000)
+                   SELECT COUNT(*) as count FROM c"""
+            ))
+            await asyncio.sleep(0)
+            await db.restore("test_restore.db")
+            in_flight = await slow_read
+            row = await db.fetch_one("SELECT COUNT(*) as count FROM pool_test")
+            stats = db.get_pool_stats()
+            self.test("Restore during a read", in_flight['count'] == 300000 and row['count'] == 21
+                      and stats['size'] == 1 and stats['in_use'] == 0)
             await db.close()
+            os.remove("test_restore.db")
             
             # Cleanup
             if os.path.exists("test_bot.db"):
@@ -103,6 +175,201 @@ class BotTester:
             hearts = await user_manager.lose_heart(12345)
             self.test("Lose heart", hearts == 4)
             
+            # Test user cache is kept current by writes
+            cached = await user_manager.get_or_create_user(12345)
+            self.test("User cache hit", user_manager.user_cache.hits > 0 and cached['xp'] == 100)
+            cached['xp'] = -1
+            user = await user_manager.get_or_create_user(12345)
+            self.test("User cache returns copies", user['xp'] == 100)
+            
+            # Test a write committed during a cache fill keeps the stale row out
+            user_manager.user_cache.invalidate(12345)
+            fetch_one = db.fetch_one
+            
+            async def racing_fetch_one(query, params=()):
+                db.fetch_one = fetch_one
+                row = await fetch_one(query, params)
+                await user_manager.add_xp(12345, 5)
+                return row
+            
+            db.fetch_one = racing_fetch_one
+            stale = await user_manager.get_or_create_user(12345)
+            fresh = await user_manager.get_or_create_user(12345)
+            self.test("Cache fill skips stale row", stale['xp'] == 100 and fresh['xp'] == 105)
+            await user_manager.add_xp(12345, -5)
+            
+            # Test hearts refill after HEART_REFILL_HOURS
+            await db.execute(
+                "UPDATE users SET last_heart_refill = datetime('now', 'localtime', '-5 hours') WHERE user_id = ?",
+                (12345,)
+            )
+            user_manager.user_cache.invalidate(12345)  # Direct SQL bypasses the cache
+            heart_info = await user_manager.update_hearts(12345)
+            self.test("Hearts refill", heart_info['refilled'] and heart_info['hearts'] == 5)
+            hearts = await user_manager.lose_heart(12345)
+            
+            # Test lazy daily heart reset (nothing written until a heart is spent)
+            await db.execute(
+                "UPDATE users SET hearts = 1, last_heart_refill = datetime('now', 'localtime', '-1 day') WHERE user_id = ?",
+                (12345,)
+            )
+            user_manager.user_cache.invalidate(12345)
+            heart_info = await user_manager.update_hearts(12345)
+            self.test("Daily heart reset", heart_info['hearts'] == 5)
+            hearts = await user_manager.lose_heart(12345)
+            self.test("Spend after daily reset", hearts == 4)
+            
+            # Test bulk XP awards
+            await user_manager.get_or_create_user(54321, "other", "Other")
+            await user_manager.add_xp_bulk([(12345, 0), (54321, 25)])
+            other = await user_manager.get_or_create_user(54321)
+            self.test("Bulk add XP", other['xp'] == 25)
+            
+            # Test lesson completion is one unit of work
+            result = await user_manager.complete_lesson(12345, "english", "beginner", "eng_b_01", 100)
+            self.test("Complete lesson", result['xp'] == 100 + self.config.XP_PER_LESSON_COMPLETE)
+            
+            # Test transaction rollback
+            try:
+                async with db.transaction() as tx:
+                    await user_manager.add_xp(12345, 1000, tx=tx)
+                    raise RuntimeError("abort")
+            except RuntimeError:
+                pass
+            user = await user_manager.get_or_create_user(12345)
+            self.test("Transaction rollback", user['xp'] == result['xp'])
+            
+            # Test achievements unlock once
+            first = await user_manager.unlock_achievement(12345, "perfect_quiz")
+            second = await user_manager.unlock_achievement(12345, "perfect_quiz")
+            self.test("Achievement unlocks once", first and not second)
+            
+            # Test rank service matches the SQL fallback
+            from managers.rank_manager import RankManager
+            rank_manager = RankManager(db)
+            await rank_manager.load()
+            ranked = UserManager(db, rank_manager=rank_manager)
+            await ranked.add_xp(54321, 10000)
+            memory_rank = await ranked.get_user_rank(54321)
+            sql_rank = await user_manager.get_user_rank(54321)
+            self.test("Rank service", memory_rank['rank'] == sql_rank['rank'] == 1)
+            top = await ranked.get_leaderboard(2)
+            self.test("Leaderboard from rank service", [u['user_id'] for u in top] == [54321, 12345])
+            
+            # Test weekly and per-language rollups
+            from managers.user_manager import week_period
+            await ranked.add_xp(12345, 30, language="korean")
+            weekly = await ranked.get_leaderboard(10, period=week_period())
+            korean = await ranked.get_leaderboard(10, language="korean")
+            self.test("Weekly leaderboard", weekly[0]['user_id'] == 54321 and len(weekly) == 2)
+            self.test("Language leaderboard", [(u['user_id'], u['xp']) for u in korean] == [(12345, 30)])
+            rank = await ranked.get_user_rank(12345, period=week_period())
+            self.test("Weekly rank", rank['rank'] == 2)
+            
+            # Test the achievement engine reacts to game events
+            from managers.achievement_manager import AchievementManager
+            engine_users = UserManager(db)
+            achievements = AchievementManager(engine_users)
+            await engine_users.get_or_create_user(777)
+            first = await engine_users.complete_lesson(777, "english", "beginner", "eng_b_01", 80)
+            again = await engine_users.complete_lesson(777, "english", "beginner", "eng_b_01", 90)
+            self.test("Achievement on first lesson", first['achievements'] == ["first_lesson"] and again['achievements'] == [])
+            perfect = await engine_users.publish("quiz_scored", 777, score=100)
+            repeat = await engine_users.publish("quiz_scored", 777, score=100)
+            counters = await achievements.get_counters(777)
+            self.test("Achievement on perfect quiz", perfect == ["perfect_quiz"] and repeat == [])
+            self.test("Achievement counters", counters == {"lessons_completed": 1, "perfect_quizzes": 2})
+            
+            # Test the progress summary is maintained by complete_lesson
+            summary = await engine_users.get_progress_summary(777)
+            self.test("Progress summary", summary == {
+                "english": {"total_lessons": 1, "units": {"beginner": {"lessons_completed": 1, "best_score": 90}}}
+            })
+            status = await engine_users.get_lessons_status(777, "english", "beginner", ["eng_b_01", "eng_b_02"])
+            self.test("Batched lesson status", status == {"eng_b_01": {"completed": True, "score": 90}})
+            
+            # Test the broadcast engine against a fake bot
+            from telegram.error import Forbidden, RetryAfter
+            from managers.broadcast_manager import BroadcastManager
+            
+            class FakeBot:
+                def __init__(self):
+                    self.sent = []
+                    self.flooded = False
+                
+                async def send_message(self, chat_id, text, parse_mode=None):
+                    if chat_id == 54321:
+                        raise Forbidden("Forbidden: bot was blocked by the user")
+                    if chat_id == 777 and not self.flooded:
+                        self.flooded = True
+                        raise RetryAfter(0)
+                    self.sent.append(chat_id)
+            
+            bot = FakeBot()
+            broadcaster = BroadcastManager(engine_users, rate_per_second=1000, per_chat_interval=0, workers=4)
+            stats = await broadcaster.broadcast(bot, [(user_id, "hi") for user_id in (12345, 54321, 777, 1, 2)])
+            blocked = await engine_users.get_or_create_user(54321)
+            self.test("Broadcast delivers", sorted(bot.sent) == [1, 2, 777, 12345] and stats['sent'] == 4)
+            self.test("Broadcast retries after flood control", stats['retries'] == 1)
+            self.test("Broadcast disables blocked users", stats['blocked'] == 1 and not blocked['notification_enabled'])
+            
+            # Test reminders are sent only when due, then rescheduled into each user's slot
+            for user_id in (1001, 1002):
+                await engine_users.get_or_create_user(user_id)
+            await db.execute("""UPDATE users SET next_reminder_at = '2000-01-01T00:00:00',
+                                last_active = datetime('now', 'localtime', '-2 days')""")
+            await db.execute("UPDATE users SET last_active = ? WHERE user_id = 777", (datetime.now().isoformat(),))
+            await engine_users.reschedule_active_reminders(24)
+            due = [await engine_users.claim_due_reminders(24, 2), await engine_users.claim_due_reminders(24, 2)]
+            again = await engine_users.claim_due_reminders(24, 2)
+            active = await db.fetch_one("SELECT next_reminder_at FROM users WHERE user_id = 777")
+            slots = await db.fetch_all("SELECT next_reminder_at FROM users WHERE user_id IN (12345, 1001, 1002)")
+            self.test("Due reminders", sorted(sum(due, [])) == [1001, 1002, 12345] and again == [])
+            self.test("Claimed reminders keep their slots", len({row['next_reminder_at'] for row in slots}) == 3)
+            self.test("Active users rescheduled", active['next_reminder_at'] > datetime.now().isoformat())
+            
+            # Test a slot late in the hour stays put when claimed in the next hour
+            from datetime import timedelta
+            await engine_users.get_or_create_user(3500)  # slot 58:20
+            due_at = datetime.now().replace(minute=58, second=20, microsecond=0) - timedelta(hours=1)
+            await db.execute("UPDATE users SET next_reminder_at = ? WHERE user_id = 3500", (due_at.isoformat(),))
+            claimed = await engine_users.claim_due_reminders(24, 10)
+            late = await db.fetch_one("SELECT next_reminder_at FROM users WHERE user_id = 3500")
+            self.test("Late slot does not drift",
+                      claimed == [3500] and late['next_reminder_at'] == (due_at + timedelta(hours=24)).isoformat())
+            
+            # Test the outbox dedups, delivers, retries and cleans up
+            from managers.outbox_manager import OutboxManager
+            outbox = OutboxManager(db, broadcaster)
+            queued = await outbox.enqueue_many([(12345, "one", "k1"), (12345, "one", "k1"), (1, "two", "k2")])
+            self.test("Outbox dedup", queued == 2)
+            
+            class FlakyBot(FakeBot):
+                async def send_message(self, chat_id, text, parse_mode=None):
+                    if chat_id == 1:
+                        raise RuntimeError("boom")
+                    await super().send_message(chat_id, text, parse_mode)
+            
+            totals = await outbox.drain(FlakyBot())
+            retry = await db.fetch_one("SELECT status, attempts, next_attempt_at FROM notification_outbox WHERE dedup_key = 'k2'")
+            self.test("Outbox delivers", totals == {"sent": 1, "blocked": 0, "failed": 1})
+            self.test("Outbox schedules retry", retry['status'] == "pending" and retry['attempts'] == 1 and retry['next_attempt_at'] > datetime.now().isoformat())
+            removed = await outbox.cleanup(-1)
+            self.test("Outbox cleanup", removed == 1 and await outbox.get_stats() == {"pending": 1})
+            
+            # Test each delivery is recorded before the next send starts
+            serial = OutboxManager(db, BroadcastManager(engine_users, rate_per_second=1000, per_chat_interval=0, workers=1))
+            await serial.enqueue_many([(12345, "a", "k3"), (777, "b", "k4")])
+            seen = []
+            
+            class CheckingBot:
+                async def send_message(self, chat_id, text, parse_mode=None):
+                    row = await db.fetch_one("SELECT status FROM notification_outbox WHERE dedup_key = 'k3'")
+                    seen.append(row['status'])
+            
+            await serial.drain(CheckingBot())
+            self.test("Outbox records each send", seen == ["pending", "sent"])
+            
             await db.close()
             os.remove("test_bot.db")
         except Exception as e:
@@ -134,6 +401,86 @@ class BotTester:
             quiz = lesson_manager.get_quiz_questions("english", "beginner", "eng_b_01")
             self.test("Quiz questions exist", len(quiz) > 0)
             
+            # Test indexed lookups and question ids
+            question_ids = lesson_manager.get_question_ids("english", "beginner", "eng_b_01")
+            self.test("Question ids", [lesson_manager.get_question(q) for q in question_ids] == quiz)
+            self.test("Lesson by bare id", lesson_manager.find_lesson("eng_b_01")[:2] == ("english", "beginner"))
+            
+            # Test quiz sessions store question ids and still read legacy copies
+            import json
+            from handlers.quiz_handler import QuizHandler
+            quiz_handler = QuizHandler(None, lesson_manager)
+            by_id = quiz_handler._session_question(json.dumps({"question_ids": question_ids}), 0)
+            legacy = quiz_handler._session_question(json.dumps(quiz), 0)
+            self.test("Quiz session questions", by_id == legacy == quiz[0])
+            
+            # Test lesson cards render once and take per-user status
+            from handlers.lesson_handler import LessonHandler
+            lesson_handler = LessonHandler(None, lesson_manager)
+            card = lesson_handler._lesson_card(lesson_manager.snapshot, "english", "beginner", "eng_b_01")
+            again = lesson_handler._lesson_card(lesson_manager.snapshot, "english", "beginner", "eng_b_01")
+            self.test("Lesson card cached", card is again and lesson_handler.card_cache.hits == 1)
+            text = lesson_handler._compose_card(card, 3, {"completed": True, "score": 90})
+            self.test("Lesson card status", text.startswith(card.head + "❤️ 3/5  ✅") and text.endswith(card.body))
+            
+            # Test hot reload: new versions swap in, bad files are rejected
+            import shutil
+            import tempfile
+            reload_dir = tempfile.mkdtemp()
+            reload_path = os.path.join(reload_dir, "lessons.json")
+            shutil.copy("data/lessons.json", reload_path)
+            reloading = LessonManager(reload_path)
+            old_digest = reloading.snapshot.digest
+            session = json.dumps({"content": old_digest, "question_ids": question_ids})
+            
+            catalog = json.loads(open(reload_path).read())
+            catalog["english"]["beginner"][0]["quiz"][0]["question"] = "Reloaded?"
+            with open(reload_path, "w") as f:
+                json.dump(catalog, f)
+            os.utime(reload_path, ns=(0, 10 ** 9))
+            reloaded = await reloading.reload_if_changed()
+            new_question = reloading.get_question(reloading.get_question_ids("english", "beginner", "eng_b_01")[0])
+            self.test("Lessons hot reload", reloaded and reloading.version == 2 and new_question["question"] == "Reloaded?")
+            old_question = QuizHandler(None, reloading)._session_question(session, 0)
+            self.test("Quiz keeps its content version", old_question == quiz[0])
+            
+            catalog["english"]["beginner"][0]["quiz"][0]["correct"] = 99
+            with open(reload_path, "w") as f:
+                json.dump(catalog, f)
+            os.utime(reload_path, ns=(0, 2 * 10 ** 9))
+            rejected = not await reloading.reload_if_changed()
+            self.test("Invalid lessons rejected", rejected and reloading.version == 2)
+            
+            # Test compiled bundle loads units lazily with the same content
+            from managers.lesson_bundle import compile_bundle
+            bundle_path = os.path.join(reload_dir, "lessons.bundle")
+            compile_bundle(lesson_manager.lessons_data, bundle_path)
+            bundled = LessonManager(bundle_path)
+            counts = [bundled.count_lessons("english", unit) for unit in bundled.get_units("english")]
+            expected = [len(lesson_manager.get_lessons("english", unit)) for unit in lesson_manager.get_units("english")]
+            self.test("Bundle loads lazily", bundled.get_stats()['units_loaded'] == 0 and counts == expected)
+            bundled_ids = bundled.get_question_ids("english", "beginner", "eng_b_01")
+            self.test("Bundle content", bundled_ids == question_ids and bundled.get_question(question_ids[0]) == quiz[0])
+            self.test("Bundle loads touched unit only", bundled.get_stats()['units_loaded'] == 1)
+            
+            # Test sharded layout: a bad shard is rejected on its own
+            shard_dir = os.path.join(reload_dir, "lessons")
+            for language, units in lesson_manager.lessons_data.items():
+                os.makedirs(os.path.join(shard_dir, language))
+                for unit, lessons in units.items():
+                    with open(os.path.join(shard_dir, language, f"{unit}.json"), "w") as f:
+                        json.dump(lessons, f)
+            with open(os.path.join(shard_dir, "korean", "advanced.json"), "w") as f:
+                f.write('[{"id": "broken"')
+            sharded = LessonManager(shard_dir)
+            self.test("Sharded lessons load", sharded.get_quiz_questions("english", "beginner", "eng_b_01") == quiz)
+            self.test("Bad shard rejected alone", sharded.get_units("korean") == ["beginner", "intermediate"])
+            
+            with open(os.path.join(shard_dir, "english", "beginner.json"), "w") as f:
+                json.dump([{"id": "eng_b_01"}], f)
+            await sharded.reload_if_changed()
+            self.test("Bad shard keeps previous unit", sharded.version == 2 and sharded.get_lessons("english", "beginner") == eng_beginner)
+            shutil.rmtree(reload_dir)
         except Exception as e:
             print(f"❌ Lesson Manager error: {e}")
             self.failed += 1
@@ -175,6 +522,15 @@ class BotTester:
             text = "Hello_World*Test"
             escaped = escape_markdown(text)
             self.test("Markdown escaping", "\\" in escaped)
+            self.test("Markdown escaping all specials", escape_markdown("a.b-c!(d)") == "a\\.b\\-c\\!\\(d\\)")
+            
+            # Test compiled message templates
+            from utils.formatter import MessageTemplate
+            template = MessageTemplate("*Hi {name}!* Score: {score}% (+{xp} XP){extra:raw}")
+            rendered = template.render(name="Ann_1", score=90, xp=10, extra="_done_")
+            self.test("Message template", rendered == "*Hi Ann\\_1\\!* Score: 90% \\(\\+10 XP\\)_done_")
+            pipes = MessageTemplate("a | b ||secret|| {n}").render(n=-1)
+            self.test("Template escapes single pipe", pipes == "a \\| b ||secret|| \\-1")
             
             # Test progress bar
             progress = create_progress_bar(3, 6)
@@ -185,6 +541,41 @@ class BotTester:
             duration = format_duration(3700)
             self.test("Duration formatting", "1h" in duration)
             
+            # Test keyboard registry reuse
+            from utils.keyboards import KEYBOARDS, back_btn, back_row
+            self.test("Static keyboard shared", KEYBOARDS.get("main_menu") is KEYBOARDS.get("main_menu"))
+            back = back_btn("lang_english", "← Back")
+            self.test("Dynamic keyboard cached",
+                      back is back_btn("lang_english", "← Back") and back is not back_btn("lang_korean", "← Back")
+                      and back_row("lang_english", "← Back")[0].callback_data == "lang_english")
+            
+            # Test LRU cache eviction and TTL
+            from utils.cache import LRUCache
+            now = [0.0]
+            cache = LRUCache(max_size=2, ttl_seconds=10, clock=lambda: now[0])
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.get("a")
+            cache.set("c", 3)
+            self.test("LRU eviction", cache.get("b") is None and cache.get("a") == 1)
+            now[0] = 11.0
+            self.test("TTL expiry", cache.get("a") is None and cache.get_stats()['expirations'] == 1)
+            
+            # Test token bucket pacing
+            from utils.rate_limit import TokenBucket
+            clock = [0.0]
+            
+            async def fake_sleep(seconds):
+                clock[0] += seconds
+            
+            bucket = TokenBucket(rate=10, capacity=2, clock=lambda: clock[0], sleep=fake_sleep)
+            for _ in range(12):
+                await bucket.acquire()
+            self.test("Token bucket rate", abs(clock[0] - 1.0) < 1e-6)
+            bucket.pause(5)
+            await bucket.acquire()
+            self.test("Token bucket pause", clock[0] >= 6.0)
+            
             # Test text truncation
             long_text = "A" * 200
             truncated = truncate_text(long_text, 100)
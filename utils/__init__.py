@@ -2,17 +2,26 @@
 Initialize utils package
 """
 from .error_handler import error_handler
+from .cache import LRUCache
+from .rate_limit import TokenBucket
 from .formatter import (
     escape_markdown,
+    MessageTemplate,
     create_progress_bar,
     format_duration,
     truncate_text
 )
+from .keyboards import KEYBOARDS, KeyboardRegistry
 
 __all__ = [
     'error_handler',
+    'LRUCache',
+    'TokenBucket',
     'escape_markdown',
+    'MessageTemplate',
     'create_progress_bar',
     'format_duration',
-    'truncate_text'
+    'truncate_text',
+    'KEYBOARDS',
+    'KeyboardRegistry'
 ]
@@ -2,6 +2,35 @@
 Text Formatter Utilities
 """
 import re
+from string import Formatter
+from typing import Any, List, Tuple
+
+# Characters MarkdownV2 requires escaping outside of entities
+SPECIAL_CHARS = "\\_*[]()~`>#+-=|{}.!"
+# Characters template text keeps as formatting: *bold* _italic_ `code` ~strike~;
+# "|" is kept only as a "||" spoiler pair, a single one is escaped
+MARKUP_CHARS = "*_`~"
+
+# Backslash goes first so the backslashes added by later replacements stay single
+_REPLACEMENTS = tuple((char, "\\" + char) for char in SPECIAL_CHARS)
+_LITERAL_RE = re.compile(
+    r"\|\||[" + re.escape("".join(c for c in SPECIAL_CHARS if c not in MARKUP_CHARS)) + "]"
+)
+
+
+def _escape_literal(match: re.Match) -> str:
+    return match[0] if match[0] == "||" else "\\" + match[0]
+
+
+def _escape(text: str) -> str:
+    """Escape MarkdownV2 specials; words and numbers return as they are"""
+    if text.isalnum():
+        return text
+    # A membership test is a fast C scan, so only the characters present cost a replace
+    for char, escaped in _REPLACEMENTS:
+        if char in text:
+            text = text.replace(char, escaped)
+    return text
 
 
 def escape_markdown(text: str, for_button: bool = False) -> str:
@@ -22,13 +51,66 @@ def escape_markdown(text: str, for_button: bool = False) -> str:
         # For buttons, only escape underscores that might cause issues
         return str(text)
     
-    # MarkdownV2 special characters
-    special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
+    return _escape(str(text))
+
+
+class MessageTemplate:
+    """
+    MarkdownV2 message compiled once and rendered with a single join
     
-    for char in special_chars:
-        text = text.replace(char, f'\\{char}')
+    Template text is plain text with named ``str.format`` fields. Literal
+    text is escaped at compile time, except for the formatting characters
+    in ``MARKUP_CHARS`` and ``||`` spoiler pairs. Field values are escaped
+    when rendered, after any format spec is applied; non-negative ints are
+    inserted as they are. ``{name:raw}`` inserts a value that is already
+    MarkdownV2, such as another rendered template.
     
-    return text
+    Example:
+        SCORE = MessageTemplate("*{name}* scored {score}% (best {best}%)!")
+        SCORE.render(name="Mya", score=90, best=95)
+    """
+    
+    def __init__(self, template: str):
+        self.template = template
+        head = ""
+        # One (field, format spec, is raw, literal text that follows) per field
+        steps: List[List[Any]] = []
+        for literal, name, spec, conversion in Formatter().parse(template):
+            literal = _LITERAL_RE.sub(_escape_literal, literal)
+            if steps:
+                steps[-1][3] += literal
+            else:
+                head += literal
+            if name is None:
+                continue
+            if not name or conversion:
+                raise ValueError(f"Template fields must be named, without conversions: {template!r}")
+            steps.append([name, spec or "", spec == "raw", ""])
+        
+        self._head = head
+        self._steps: Tuple[Tuple[str, str, bool, str], ...] = tuple(tuple(step) for step in steps)
+        self.fields = tuple(step[0] for step in steps)
+    
+    def render(self, **values: Any) -> str:
+        """Fill in the fields and return MarkdownV2 text"""
+        if not self._steps:
+            return self._head
+        
+        parts = [self._head]
+        append = parts.append
+        for name, spec, raw, literal in self._steps:
+            value = values[name]
+            if raw:
+                pass
+            elif spec:
+                value = _escape(format(value, spec))
+            elif type(value) is int and value >= 0:
+                value = str(value)
+            else:
+                value = _escape(str(value))
+            append(value)
+            append(literal)
+        return "".join(parts)
 
 
 def create_progress_bar(completed: int, total: int, length: int = 6) -> str:
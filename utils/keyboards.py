@@ -0,0 +1,174 @@
+"""
+Keyboard Registry - Inline keyboards built once and shared
+"""
+from typing import Any, Callable, Dict, Hashable, Sequence, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from config import Config
+from utils.cache import LRUCache
+
+# Rows of (button text, callback data)
+Layout = Sequence[Sequence[Tuple[str, str]]]
+
+
+def build_keyboard(layout: Layout) -> InlineKeyboardMarkup:
+    """Build a markup from a layout"""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(text, callback_data=data) for text, data in row]
+        for row in layout
+    ])
+
+
+class KeyboardRegistry:
+    """
+    Inline keyboards built once and served by key
+    
+    Markups are immutable once built, so one object can be sent to any
+    number of chats. Static menus are registered at import time; keyboards
+    that depend on a parameter (a back target, a language) are built on
+    first use and kept in a bounded cache keyed by that parameter.
+    
+    Args:
+        dynamic_size: Maximum number of parameterized keyboards kept
+    """
+    
+    def __init__(self, dynamic_size: int = 1000):
+        self._static: Dict[str, InlineKeyboardMarkup] = {}
+        self._dynamic = LRUCache(dynamic_size, ttl_seconds=float("inf"))
+    
+    def register(self, key: str, layout: Layout) -> InlineKeyboardMarkup:
+        """Build and store a static keyboard"""
+        self._static[key] = build_keyboard(layout)
+        return self._static[key]
+    
+    def get(self, key: str) -> InlineKeyboardMarkup:
+        """Get a registered keyboard (KeyError if unknown)"""
+        return self._static[key]
+    
+    def dynamic(self, key: Hashable, layout: Callable[[], Layout]) -> InlineKeyboardMarkup:
+        """Get a parameterized keyboard, building it from ``layout()`` on first use"""
+        markup = self._dynamic.get(key)
+        if markup is None:
+            markup = build_keyboard(layout())
+            self._dynamic.set(key, markup)
+        return markup
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry size and dynamic cache statistics"""
+        return {"static": len(self._static), **self._dynamic.get_stats()}
+
+
+KEYBOARDS = KeyboardRegistry()
+
+# Main menus
+KEYBOARDS.register("start", [
+    [("📚 Start Learning", "menu_learn")],
+    [("👤 My Profile", "menu_profile")],
+    [("🏆 Leaderboard", "menu_leaderboard")],
+    [("❓ Help", "menu_help")]
+])
+KEYBOARDS.register("main_menu", [
+    [("📚 Start Learning", "menu_learn")],
+    [("👤 My Profile", "menu_profile")],
+    [("🏆 Leaderboard", "menu_leaderboard")]
+])
+KEYBOARDS.register("home", [[("🏠 Main Menu", "menu_main")]])
+KEYBOARDS.register("languages", [
+    *([(language['name'], f"lang_{code}")] for code, language in Config.LANGUAGES.items()),
+    [("🏠 Main Menu", "menu_main")]
+])
+
+# Profile
+for enabled in (True, False):
+    KEYBOARDS.register(f"profile_notifications_{'on' if enabled else 'off'}", [
+        [(f"🔔 Notifications: {'ON' if enabled else 'OFF'}", "profile_toggle_notif")],
+        [("📊 Detailed Stats", "profile_stats")],
+        [("🏠 Main Menu", "menu_main")]
+    ])
+KEYBOARDS.register("back_to_profile", [[("← Back to Profile", "menu_profile")]])
+
+# Feature menus
+KEYBOARDS.register("learn_menu", [
+    [("📅 Daily Lesson", "learn_daily"), ("🗺️ Learning Path", "learn_path")],
+    [("🎧 Listening", "learn_listen"), ("🔄 Review", "learn_review")],
+    [("◀️ Menu", "menu_main")]
+])
+KEYBOARDS.register("vocab_menu", [
+    [("📖 Daily Words", "vocab_daily"), ("🗂️ My Deck", "vocab_deck")],
+    [("🃏 Flashcards", "vocab_flash"), ("📥 Review Due", "vocab_review")],
+    [("◀️ Menu", "menu_main")]
+])
+KEYBOARDS.register("quiz_menu", [
+    [("🎲 Random Quiz", "quiz_random"), ("⚡ Challenge", "quiz_challenge")],
+    [("📝 Level Exam", "quiz_exam"), ("🏆 Leaderboard", "quiz_tops")],
+    [("◀️ Menu", "menu_main")]
+])
+KEYBOARDS.register("social_menu", [
+    [("👥 Study Groups", "social_groups"), ("⚔️ Duel", "social_duel")],
+    [("🃏 Share Card", "social_share"), ("◀️ Menu", "menu_main")]
+])
+KEYBOARDS.register("settings_menu", [
+    [("🌍 Change Language", "settings_lang"), ("🎯 Daily Goal", "settings_goal")],
+    [("👤 Profile", "settings_profile"), ("◀️ Menu", "menu_main")]
+])
+KEYBOARDS.register("tutor_menu", [
+    [("💬 Free Chat", "tutor_chat"), ("🎭 Roleplay", "tutor_roleplay")],
+    [("✏️ Grammar Check", "tutor_grammar"), ("🔁 Shadowing", "tutor_shadow")],
+    [("◀️ Menu", "menu_main")]
+])
+
+GOAL_MINUTES = [5, 10, 15, 20, 30, 45, 60]
+KEYBOARDS.register("goal_picker", [
+    *([(f"⏱ {minutes} min", f"goal:{minutes}") for minutes in GOAL_MINUTES[i:i + 3]]
+      for i in range(0, len(GOAL_MINUTES), 3)),
+    [("◀️ Back", "menu_settings")]
+])
+
+
+def single_button(text: str, data: str) -> InlineKeyboardMarkup:
+    """Keyboard with one button"""
+    return KEYBOARDS.dynamic(("button", text, data), lambda: [[(text, data)]])
+
+
+def back_btn(target: str = "menu_main", text: str = "◀️ Back to Menu") -> InlineKeyboardMarkup:
+    """Single back button to a callback target"""
+    return single_button(text, target)
+
+
+def yes_no(yes_data: str, no_data: str) -> InlineKeyboardMarkup:
+    """Yes / No confirmation"""
+    return KEYBOARDS.dynamic(
+        ("yes_no", yes_data, no_data),
+        lambda: [[("✅ Yes", yes_data), ("❌ No", no_data)]]
+    )
+
+
+def roleplay_picker(scenarios: Dict[str, Dict[str, Any]]) -> InlineKeyboardMarkup:
+    """Two scenarios per row, from a {key: {"title": ...}} catalog"""
+    items = tuple((key, info["title"]) for key, info in scenarios.items())
+    return KEYBOARDS.dynamic(("roleplay", items), lambda: [
+        *([(title, f"roleplay:{key}") for key, title in items[i:i + 2]]
+          for i in range(0, len(items), 2)),
+        [("◀️ Back", "menu_tutor")]
+    ])
+
+
+def flashcard_rating(vocab_id: int) -> InlineKeyboardMarkup:
+    """Hard / OK / Easy rating for a flashcard"""
+    return build_keyboard([[
+        ("😰 Hard (1)", f"fc:{vocab_id}:1"),
+        ("🤔 OK (3)", f"fc:{vocab_id}:3"),
+        ("😄 Easy (5)", f"fc:{vocab_id}:5")
+    ]])
+
+
+def duel_invite(duel_id: int) -> InlineKeyboardMarkup:
+    """Accept / Decline for a duel invitation"""
+    return build_keyboard([[
+        ("⚔️ Accept", f"duel_accept:{duel_id}"),
+        ("❌ Decline", f"duel_decline:{duel_id}")
+    ]])
+
+
+def back_row(target: str = "menu_main", text: str = "◀️ Back to Menu") -> Tuple[InlineKeyboardButton, ...]:
+    """Shared back row for appending to a per-user keyboard"""
+    return back_btn(target, text).inline_keyboard[0]
@@ -0,0 +1,57 @@
+"""
+Rate Limiting Utilities
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket shared by concurrent senders
+    
+    Args:
+        rate: Tokens added per second
+        capacity: Largest burst allowed (defaults to one second of tokens)
+        clock: Monotonic time source (injectable for tests)
+        sleep: Coroutine used to wait (injectable for tests)
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self, now: float):
+        """Add the tokens earned since the last refill"""
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+    
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while (e.g. after a 429) and drain the burst"""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+        self._updated = self._paused_until
+        self.tokens = 0.0
+    
+    async def acquire(self):
+        """Wait until a token is available and take it (first come, first served)"""
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    await self._sleep(self._paused_until - now)
+                    continue
+                
+                self._refill(now)
+                if self.tokens >= 1 - 1e-9:  # Tolerate float rounding in the refill
+                    self.tokens = max(0.0, self.tokens - 1)
+                    return
+                await self._sleep((1 - self.tokens) / self.rate)